@@ -0,0 +1,55 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+from lazytorch import Tensor, Value, DenseLayer, Leaky_ReLU, no_grad
+import random
+import time
+
+def build_mlp():
+    """
+    Same architecture as `FunctionApproximatorNN` in `examples/nn.py`: 1 -> 32 -> 32 -> 32 -> 1, with Leaky ReLU in between.
+    """
+    return [DenseLayer(1, 32), DenseLayer(32, 32), DenseLayer(32, 32), DenseLayer(32, 1)]
+
+def forward(layers, inp: Tensor) -> Tensor:
+    output = inp
+    for layer in layers[:-1]:
+        output = Leaky_ReLU(layer(output))
+    return layers[-1](output)
+
+def evaluation_throughput(layers, xs) -> float:
+    """
+    Returns single-point forward passes per second, the same way `examples/nn_eval.py` evaluates a checkpoint.
+    """
+    start_time = time.perf_counter()
+    for x in xs:
+        forward(layers, Tensor([[x]])).item()
+    return len(xs) / (time.perf_counter() - start_time)
+
+def value_throughput(num_ops: int) -> float:
+    """
+    Returns scalar `Value` multiply-adds per second.
+    """
+    a = Value(1.0001)
+    total = Value(0.0)
+    start_time = time.perf_counter()
+    for _ in range(num_ops):
+        total = total + a * a
+    return num_ops / (time.perf_counter() - start_time)
+
+if __name__ == "__main__":
+    random.seed(0)
+    layers = build_mlp()
+    xs = [i * (20 / 999) - 10 for i in range(1000)]
+
+    tracked = evaluation_throughput(layers, xs)
+    with no_grad():
+        untracked = evaluation_throughput(layers, xs)
+    print(f"MLP evaluation, graph tracked: {tracked:,.0f} forward passes / second")
+    print(f"MLP evaluation, no_grad:       {untracked:,.0f} forward passes / second ({untracked / tracked:.2f}x)")
+
+    tracked = value_throughput(200000)
+    with no_grad():
+        untracked = value_throughput(200000)
+    print(f"Value ops, graph tracked: {tracked:,.0f} multiply-adds / second")
+    print(f"Value ops, no_grad:       {untracked:,.0f} multiply-adds / second ({untracked / tracked:.2f}x)")
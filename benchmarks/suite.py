@@ -0,0 +1,243 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+from lazytorch import Tensor, Value, Network, MSE_Loss, DenseLayer, Leaky_ReLU, backprop
+import argparse
+import gc
+import json
+import pickle
+import random
+import tempfile
+import time
+import tracemalloc
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# every benchmark adds its results here: name -> {"value": number, "unit": str, "better": "higher" or "lower"}
+BENCHMARKS = {}
+
+def benchmark(group: str):
+    """
+    Registers a benchmark function under a group name, so it can be run on its own with `--only <group>`.
+    """
+    def register(fn):
+        BENCHMARKS[group] = fn
+        return fn
+    return register
+
+def best_time(fn, repeats: int, setup=None, min_time: float = 0.05) -> float:
+    """
+    Runs fn `repeats` times and returns the fastest run in seconds; the fastest run is the one least disturbed by everything else on the machine.
+    Calls too quick to time on their own (like a sub-millisecond save) get batched: each run calls fn as many times as it takes to fill
+    min_time seconds, and counts as the time per call. With a setup function, every call is fn(setup()), with all of a run's setups
+    done before its timer starts, so only fn itself is timed.
+    """
+    def run(number: int) -> float:
+        args = [(setup(),) if setup is not None else () for _ in range(number)]
+        gc.disable()  # like timeit: when the garbage collector happens to kick in would be more noise
+        try:
+            start_time = time.perf_counter()
+            for call_args in args:
+                fn(*call_args)
+            return time.perf_counter() - start_time
+        finally:
+            gc.enable()
+
+    number = 1
+    while True:
+        elapsed = run(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)) + 1)
+    return min(run(number) for _ in range(repeats)) / number
+
+# units of results that measure speed, which get scaled by the calibration loop when comparing against a baseline
+_TIMED_UNITS = ('ms', 'ops/s')
+_FAST_MS = 1.0  # timings under this many ms per call are at the mercy of caches and the timer, so they get twice the tolerance
+
+@benchmark('calibration')
+def calibration(results: dict, repeats: int):
+    """
+    A fixed amount of plain Python work (no lazytorch), to tell how fast this machine is compared to the one the baseline came from.
+    """
+    def loop():
+        total = 0.0
+        for i in range(200000):
+            total += i * 0.5
+        return total
+    results['calibration.loop'] = {'value': best_time(loop, repeats) * 1000, 'unit': 'ms', 'better': 'lower'}
+
+class MLP(Network):
+    def __init__(self):
+        """
+        Same architecture as `FunctionApproximatorNN` in `examples/nn.py`: 1 -> 32 -> 32 -> 32 -> 1, with Leaky ReLU in between.
+        """
+        super().__init__(MSE_Loss, [DenseLayer(1, 32), DenseLayer(32, 32), DenseLayer(32, 32), DenseLayer(32, 1)])
+
+    def forward(self, inp: Tensor) -> Tensor:
+        output = inp
+        for layer in self.layers[:-1]:
+            output = Leaky_ReLU(layer(output))
+        return self.layers[-1](output)
+
+    def train(self):
+        pass
+
+@benchmark('value_ops')
+def value_ops(results: dict, repeats: int):
+    num_ops = 100000
+    a, b = Value(1.0001), Value(0.9999)
+    ops = {'add': lambda: a + b, 'sub': lambda: a - b, 'mul': lambda: a * b, 'div': lambda: a / b}
+    for name, op in ops.items():
+        seconds = best_time(lambda: [op() for _ in range(num_ops)], repeats)
+        results[f'value_ops.{name}'] = {'value': num_ops / seconds, 'unit': 'ops/s', 'better': 'higher'}
+
+@benchmark('matmul')
+def matmul(results: dict, repeats: int):
+    for size in (8, 32, 64, 128):
+        a = Tensor([[random.uniform(-1, 1) for _ in range(size)] for _ in range(size)])
+        b = Tensor([[random.uniform(-1, 1) for _ in range(size)] for _ in range(size)])
+        seconds = best_time(lambda: a * b, repeats)
+        results[f'matmul.{size}x{size}'] = {'value': seconds * 1000, 'unit': 'ms', 'better': 'lower'}
+
+@benchmark('backprop')
+def backprop_graphs(results: dict, repeats: int):
+    for depth in (1000, 10000, 100000):
+        def deep():
+            x = Value(1.0)
+            out = x
+            for _ in range(depth):
+                out = out * 1.0001 + 0.0001
+            return out
+
+        results[f'backprop.depth_{depth}'] = {'value': best_time(lambda out: out.backprop(), repeats, setup=deep) * 1000, 'unit': 'ms', 'better': 'lower'}
+
+    for width in (1000, 10000, 100000):
+        def wide():
+            x = Value(1.0)
+            return [x * float(i) for i in range(width)]
+
+        # every branch is its own root, all walked in a single pass; only the backprop is timed, not building the graph
+        results[f'backprop.width_{width}'] = {'value': best_time(backprop, repeats, setup=wide) * 1000, 'unit': 'ms', 'better': 'lower'}
+
+@benchmark('mlp_step')
+def mlp_step(results: dict, repeats: int):
+    network = MLP()
+    xs = [random.uniform(-10, 10) for _ in range(32)]
+    inp, target = Tensor([[x] for x in xs]), Tensor([[x * x] for x in xs])
+    results['mlp_step.eager'] = {'value': best_time(lambda: network.train_step(inp, target, 0.0001), repeats) * 1000, 'unit': 'ms', 'better': 'lower'}
+    network.compile()
+    network.train_step(inp, target, 0.0001)  # traces the program, which shouldn't count towards the timing
+    results['mlp_step.compiled'] = {'value': best_time(lambda: network.train_step(inp, target, 0.0001), repeats) * 1000, 'unit': 'ms', 'better': 'lower'}
+
+@benchmark('checkpoint')
+def checkpoint(results: dict, repeats: int):
+    network = MLP()
+    with tempfile.TemporaryDirectory() as directory:
+        weights_path = os.path.join(directory, 'weights.lzt')
+        pickle_path = os.path.join(directory, 'network.pkl')
+
+        results['checkpoint.save_weights'] = {'value': best_time(lambda: network.save_weights(weights_path), repeats) * 1000, 'unit': 'ms', 'better': 'lower'}
+        results['checkpoint.load_weights'] = {'value': best_time(lambda: network.load_weights(weights_path), repeats) * 1000, 'unit': 'ms', 'better': 'lower'}
+        results['checkpoint.weights_file'] = {'value': os.path.getsize(weights_path), 'unit': 'bytes', 'better': 'lower'}
+        network.save_weights(weights_path, dtype='float32')
+        results['checkpoint.weights_file_float32'] = {'value': os.path.getsize(weights_path), 'unit': 'bytes', 'better': 'lower'}
+
+        def save_pickle():
+            with open(pickle_path, 'wb') as f:
+                pickle.dump(network, f)
+
+        def load_pickle():
+            with open(pickle_path, 'rb') as f:
+                pickle.load(f)
+        results['checkpoint.save_pickle'] = {'value': best_time(save_pickle, repeats) * 1000, 'unit': 'ms', 'better': 'lower'}
+        results['checkpoint.load_pickle'] = {'value': best_time(load_pickle, repeats) * 1000, 'unit': 'ms', 'better': 'lower'}
+
+@benchmark('memory')
+def memory(results: dict, repeats: int):
+    num_nodes = 10000
+
+    def bytes_per_node(build) -> float:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        nodes = build()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+        del nodes
+        return size / num_nodes
+
+    x = Value(1.0)
+    results['memory.value_node'] = {'value': bytes_per_node(lambda: [x * 2.0 for _ in range(num_nodes)]), 'unit': 'bytes', 'better': 'lower'}
+    row = Tensor([[1.0] * 32])
+    results['memory.tensor_node_1x32'] = {'value': bytes_per_node(lambda: [row * 2.0 for _ in range(num_nodes)]), 'unit': 'bytes', 'better': 'lower'}
+    row = Tensor([[1.0] * 32], dtype='float32')
+    results['memory.tensor_node_1x32_float32'] = {'value': bytes_per_node(lambda: [row * 2.0 for _ in range(num_nodes)]), 'unit': 'bytes', 'better': 'lower'}
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Returns a (name, baseline value, new value, relative change) entry for every result that got worse than its baseline by more than
+    the tolerance (a fraction, e.g. 0.2 for 20%), or twice that for timings under `_FAST_MS` per call. Results with no baseline are skipped.
+    If both have a calibration result, timings are compared relative to it, so a baseline recorded on a faster or slower machine
+    still roughly applies. Still, for tight tolerances, record the baseline on the same machine (`--save-baseline`).
+    """
+    speed = 1.0  # how many times slower this machine is than the baseline's
+    if 'calibration.loop' in results and 'calibration.loop' in baseline:
+        speed = results['calibration.loop']['value'] / baseline['calibration.loop']['value']
+
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline or name.startswith('calibration.'):
+            continue
+        old, new = baseline[name]['value'], result['value']
+        if result['unit'] in _TIMED_UNITS:
+            old = old * speed if result['better'] == 'lower' else old / speed
+        change = (new - old) / old if old else 0.0
+        worse = -change if result['better'] == 'higher' else change
+        fast = result['unit'] == 'ms' and min(old, new) < _FAST_MS
+        if worse > (2 * tolerance if fast else tolerance):
+            regressions.append((name, old, new, change))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the core engine, and optionally checks the results against stored baselines.")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="only run these benchmark groups")
+    parser.add_argument('--repeats', type=int, default=5, help="runs per benchmark within a round; the fastest one is reported")
+    parser.add_argument('--rounds', type=int, default=3, help="times to run the whole suite; each result is its best across rounds, "
+                                                               "so a stretch where the machine is busy only spoils one round")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', nargs='?', const=BASELINE, help=f"compare against a baseline JSON file (default {os.path.relpath(BASELINE)})")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown before a result counts as a regression (0.2 = 20%%)")
+    parser.add_argument('--save-baseline', action='store_true', help=f"overwrite {os.path.relpath(BASELINE)} with these results")
+    args = parser.parse_args()
+
+    results = {}
+    groups = args.only or list(BENCHMARKS)
+    for _ in range(args.rounds):
+        random.seed(0)
+        round_results = {}
+        for group in ['calibration'] + [group for group in groups if group != 'calibration']:  # always calibrated, for --compare
+            BENCHMARKS[group](round_results, args.repeats)
+        for name, result in round_results.items():
+            best = min if result['better'] == 'lower' else max
+            if name not in results or best(result['value'], results[name]['value']) != results[name]['value']:
+                results[name] = result
+    for name, result in results.items():
+        print(f"{name:<32}{result['value']:>16,.3f} {result['unit']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(BASELINE, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:,.3f} -> {new:,.3f} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.compare}")
@@ -2,7 +2,7 @@ import os
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
 from lazytorch import Tensor, Network, MSE_Loss, DenseLayer, Leaky_ReLU
-import random
+from lazytorch.data import DataLoader, TensorDataset
 import time
 
 class FunctionApproximatorNN(Network):
@@ -24,6 +24,7 @@ class FunctionApproximatorNN(Network):
         self.learning_rate = 0.0001
         self.epochs = 20
         self.num_points = 5000  # number of data points in the dataset we want to train on
+        self.batch_size = 32  # number of data points in each weight update
     
     def forward(self, inp: Tensor) -> Tensor:
         """
@@ -42,31 +43,25 @@ class FunctionApproximatorNN(Network):
         """
         x = [i * (20 / (self.num_points - 1)) - 10 for i in range(self.num_points)]
         y = [i ** 2 for i in x]
+        loader = DataLoader(TensorDataset(x, y), batch_size=self.batch_size, shuffle=True, prefetch=2)  # reshuffled every epoch for smoother, more comprehensive training
+
+        self.compile()  # same ops every step, so trace it once and replay it from then on
 
         start_time = time.time()
         total_start_time = start_time
 
         for epoch in range(self.epochs):
-            combined = list(zip(x, y))
-            random.shuffle(combined)  # shuffle these each epoch for smoother, more comprehensive training
-            x, y = zip(*combined)
-            for i, (x_val, y_val) in enumerate(zip(x, y)):
-                out = self.forward(Tensor([[x_val]]))
-                loss = self.loss_function(out, Tensor([[y_val]]))
-                self.training_losses.append(loss.value)
-
-                loss.backprop()
-                self.apply_gradients(self.learning_rate)
-                self.zero()
+            for i, (batch_x, batch_y) in enumerate(loader):  # one sample per row
+                self.train_step(batch_x, batch_y, self.learning_rate)
 
                 if (i + 1) % 50 == 0:
                     elapsed_time = time.time() - start_time
-                    print(f"Time for iteration {i - 49} to {i}: {elapsed_time:.2f} seconds")
+                    print(f"Time for batch {i - 49} to {i}: {elapsed_time:.2f} seconds")
                     start_time = time.time()
                     
                     if len(self.training_losses) >= 50:
                         avg_loss = sum(self.training_losses[-50:]) / 50
-                        print(f"Average loss over the last 50 iterations: {avg_loss:.4f}")
+                        print(f"Average loss over the last 50 batches: {avg_loss:.4f}")
                     else:
                         print(f"Last loss value: {self.training_losses[-1]:.4f}")
 
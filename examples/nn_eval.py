@@ -3,7 +3,7 @@ from nn import DenseLayer, FunctionApproximatorNN, MSE_Loss  # must import all o
 import os
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
-from lazytorch import Tensor
+from lazytorch.evaluation import evaluate_checkpoints
 import matplotlib.pyplot as plt
 import imageio
 import glob
@@ -22,7 +22,7 @@ def generate_loss_graph(fann: FunctionApproximatorNN):
 def generate_comparison_graph(fann: FunctionApproximatorNN):
     x = [i * (20 / 999) - 10 for i in range(1000)]
     y_true = [i ** 2 for i in x]
-    y_learned = [fann.forward(Tensor([[i]])).data[0][0].value for i in x]
+    y_learned = list(fann.predict(x))
 
     plt.figure(figsize=(10, 5))
     plt.plot(x, y_true, label='True Function (x^2)', color='blue')
@@ -42,11 +42,10 @@ def generate_all_comparison_graphs():
     checkpoint_files = sorted(glob.glob('checkpoints/*.pkl'), key=lambda x: int(os.path.basename(x).split('_')[1]))
     image_files = []
 
-    for checkpoint_file in checkpoint_files:
-        with open(checkpoint_file, 'rb') as f:
-            fann = pickle.load(f)
+    evaluations = evaluate_checkpoints(checkpoint_files, x, targets=y_true)  # loads + evaluates every checkpoint in parallel, in order
 
-        y_learned = [fann.forward(Tensor([[i]])).data[0][0].value for i in x]
+    for checkpoint_file, evaluation in zip(checkpoint_files, evaluations):
+        y_learned = evaluation.predictions
 
         plt.figure(figsize=(10, 5))
         plt.plot(x, y_true, color='blue')
@@ -1,6 +1,14 @@
 from .value import Value
-from .tensor import Tensor
-from .losses import MSE_Loss
-from .activations import Leaky_ReLU
-from .layers import DenseLayer
+from .tensor import Tensor, set_default_dtype, get_default_dtype
+from .losses import MSE_Loss, MAE_Loss, Huber_Loss, Cross_Entropy_Loss
+from .activations import Leaky_ReLU, ReLU, Tanh, Sigmoid
+from .layers import DenseLayer, Checkpointed
 from .network import Network
+from .optim import Optimizer, SGD, RMSProp, Adam
+from .parallel import DataParallelTrainer
+from .sweep import sweep, grid_search, random_search, log_uniform, ensemble, SweepResult
+from .checkpoint import save_weights, WeightsCheckpoint, AsyncCheckpointer
+from .data import Dataset, TensorDataset, SharedDataset, IterableDataset, CSVDataset, DataLoader
+from .autograd import backprop, no_grad, set_grad_enabled, is_grad_enabled, zero_grad
+from .profiler import Profiler
+from .lazy import lazy, LazyTensor, materialize
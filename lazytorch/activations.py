@@ -1,16 +1,64 @@
-from .tensor import Tensor
+from array import array
+from .tensor import Tensor, _BACKPROPS
+from .profiler import profiled
+from .lazy import deferrable
+import math
 
+def _sigmoid(value: float) -> float:
+    if value >= 0:
+        return 1 / (1 + math.exp(-value))
+    e = math.exp(value)  # never overflows for negative inputs, unlike exp(-value)
+    return e / (1 + e)
+
+# activation name -> (function over a whole flat buffer, its gradient given the *output* buffer and the output's gradients).
+# Every derivative here can be written in terms of the output, so a fused node never has to save its input for backprop.
+_ACTIVATIONS = {
+    'leaky_relu': (lambda data, alpha: [value if value > 0 else value * alpha for value in data],
+                   lambda out, grad, alpha: [g if y > 0 else g * alpha for y, g in zip(out, grad)]),  # the output has the same sign as the input
+    'tanh': (lambda data, alpha: [math.tanh(value) for value in data],
+             lambda out, grad, alpha: [g * (1 - y * y) for y, g in zip(out, grad)]),
+    'sigmoid': (lambda data, alpha: [_sigmoid(value) for value in data],
+                lambda out, grad, alpha: [g * y * (1 - y) for y, g in zip(out, grad)]),
+}
+
+def _activate(x: Tensor, activation: str, alpha: float = None) -> Tensor:
+    """
+    Applies an activation as a single node, which only saves alpha (if any): backprop works straight off the output's own buffer.
+    """
+    out = Tensor._from_buffer(array(x.data.typecode, _ACTIVATIONS[activation][0](x._values(), alpha)), x.shape)
+    return out._track(activation, (x,), alpha)  # gradients flow through this since the output remembers which Tensor it came from and how to route gradients back into it!
+
+@deferrable
+@profiled('Leaky_ReLU')
 def Leaky_ReLU(x: Tensor, alpha: float = 0.01) -> Tensor:
     """
-    Gradient-Safe leaky relu implementation.
-    """
-    result = []
-    for row in x.data:
-        result_row = []
-        for value in row:
-            if value.value > 0:
-                result_row.append(value)
-            else:
-                result_row.append(value * alpha)
-        result.append(result_row)
-    return Tensor(result)  # gradients can flow through this since they're stored in the Value objects comprising the tensor, not the Tensor itself!
\ No newline at end of file
+    Gradient-Safe leaky relu implementation. Builds a single node for the whole Tensor, saving only alpha for backprop.
+    """
+    return _activate(x, 'leaky_relu', alpha)
+
+@deferrable
+@profiled('ReLU')
+def ReLU(x: Tensor) -> Tensor:
+    """
+    Plain relu, i.e. a leaky relu that lets nothing through below zero.
+    """
+    return _activate(x, 'leaky_relu', 0.0)
+
+@deferrable
+@profiled('Tanh')
+def Tanh(x: Tensor) -> Tensor:
+    return _activate(x, 'tanh')
+
+@deferrable
+@profiled('Sigmoid')
+def Sigmoid(x: Tensor) -> Tensor:
+    """
+    Numerically stable sigmoid: never calls exp on a large positive number.
+    """
+    return _activate(x, 'sigmoid')
+
+def _activation_backprop(out):
+    out._dependents[0]._add_grad(_ACTIVATIONS[out._op][1](out.data, out.grad, out._saved))
+
+for _activation in _ACTIVATIONS:
+    _BACKPROPS[_activation] = _activation_backprop
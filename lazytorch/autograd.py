@@ -0,0 +1,100 @@
+import heapq
+import itertools
+from contextlib import contextmanager
+
+_node_ids = itertools.count()  # every Value and Tensor grabs the next id when it's created
+_grad_enabled = True  # global inference-mode flag: when off, ops skip all graph bookkeeping
+_profiler = None  # the enabled `Profiler`, which times each node's backprop; None means the engine runs untouched
+_generation = 0  # every gradient is stamped with the generation it was written in; gradients from older generations count as zero
+
+def next_node_id() -> int:
+    """
+    Returns a new creation stamp for a graph node. Since a node is always created after the nodes it's calculated from,
+    these stamps act like a tape of the forward pass: walking them from highest to lowest is always a valid backprop order.
+    """
+    return next(_node_ids)
+
+def zero_grad():
+    """
+    Zeros every gradient of every `Value` and `Tensor` at once, in O(1): it just starts a new gradient generation, and any
+    gradient stamped with an older one reads as zero (and gets overwritten, instead of added to, by the next backprop).
+    """
+    global _generation
+    _generation += 1
+
+def is_grad_enabled() -> bool:
+    """
+    Returns whether ops are currently building the computation graph (False in inference mode / inside `no_grad()`).
+    """
+    return _grad_enabled
+
+def set_grad_enabled(enabled: bool):
+    """
+    Turns graph building on or off globally. With it off (inference mode), every `Value` and `Tensor` op just computes
+    its result, without allocating backprop functions or tracking dependents, so nothing it produces can be backpropped through.
+    """
+    global _grad_enabled
+    _grad_enabled = enabled
+
+@contextmanager
+def no_grad():
+    """
+    Context manager (or decorator) that turns off graph building inside it, then restores whatever mode was on before.
+    Use it for evaluation / inference, where you only want the outputs: `with no_grad(): out = network.forward(x)`.
+    """
+    previous = _grad_enabled
+    set_grad_enabled(False)
+    try:
+        yield
+    finally:
+        set_grad_enabled(previous)
+
+def _released_backprop(node):
+    raise Exception("Trying to backprop through part of a graph that has already been backpropped through and freed. "
+                    "Pass retain_graph=True to the first backprop if you need to go through the same graph again.")
+
+def backprop(roots: list, seeds: list = None, retain_graph: bool = False):
+    """
+    Backprops from any number of output nodes (`Value`s or `Tensor`s) in a single walk over the shared computation graph.
+
+    Each root is seeded with its entry in `seeds` (defaulting to a gradient of 1 for every entry), then every node reachable
+    from the roots runs its backprop exactly once, in reverse creation order. No recursion and no topological sort are needed,
+    so arbitrarily deep graphs work and the cost is O(graph) no matter how many roots there are.
+
+    Unless retain_graph is set, every node with an op lets go of its parents and saved operands right after its backprop runs,
+    so holding on to a loss or an output afterwards doesn't keep the whole forward graph of that step alive. The gradients stay.
+    """
+    if seeds is None:
+        seeds = [None] * len(roots)
+    assert len(seeds) == len(roots), "Must pass in exactly one seed per root"
+
+    pending = []
+    queued_ids = set()
+    for root, seed in zip(roots, seeds):
+        root._seed(seed)
+        if root._id not in queued_ids:
+            queued_ids.add(root._id)
+            heapq.heappush(pending, (-root._id, root))
+
+    profiler = _profiler
+    if profiler is not None:
+        start = profiler._begin_backward()
+
+    generation = _generation
+    while pending:
+        _, node = heapq.heappop(pending)  # always the most recently created node left, so everything downstream of it is done
+        for dep in node._dependents:
+            if dep._id not in queued_ids:
+                queued_ids.add(dep._id)
+                heapq.heappush(pending, (-dep._id, dep))
+                if dep._generation != generation:  # a gradient left over from an older generation: zero it before anything lands in it
+                    dep._gradient, dep._generation = 0, generation
+        if profiler is None:
+            node._backprop()
+        else:
+            profiler._profiled_backprop(node)
+        if not retain_graph and node._op:
+            node._op, node._dependents, node._saved = 'released', (), None
+
+    if profiler is not None:
+        profiler._end_backward(start)
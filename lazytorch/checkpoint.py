@@ -0,0 +1,406 @@
+from array import array
+from typing import List
+from .tensor import Tensor, _DTYPES
+from .layers import Layer, DenseLayer
+import json
+import mmap
+import os
+import queue
+import struct
+import sys
+import threading
+import zlib
+
+MAGIC = b'LZTC'
+VERSION = 2
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+# file layout (all header integers little-endian):
+#   magic (4 bytes) | version (u16) | byte order of the raw arrays (u8, 1 = little) | number of layers (u32)
+#   for each layer: name length (u16) | layer class name (utf-8) | config length (u16) | layer config, like its fused activation (utf-8 JSON) | number of tensors (u16)
+#       for each tensor: array typecode (1 byte, 'd' for float64 or 'f' for float32) | number of dims (u8) | each dim (u32) | byte offset of its data from the start of the file (u64)
+#   then every tensor's raw data, each starting on an 8-byte boundary
+_PREAMBLE = struct.Struct('<4sHBI')
+_TENSOR = struct.Struct('<cB')
+
+def _layer_config(layer: Layer) -> dict:
+    """
+    Whatever besides its parameters it takes to rebuild a layer: for now, just a dense layer's fused activation.
+    """
+    if isinstance(layer, DenseLayer):
+        return {'activation': layer.activation, 'alpha': layer.alpha}
+    return {}
+
+def _layer_builder(layer_type: str):
+    """
+    Returns a function that rebuilds a layer of the given class name from its parameter Tensors and config, without needing the user's Network class.
+    """
+    def build_dense(tensors: List[Tensor], config: dict) -> DenseLayer:
+        layer = DenseLayer.__new__(DenseLayer)
+        layer.weights, layer.biases = tensors
+        layer.activation, layer.alpha = config['activation'], config['alpha']
+        return layer
+
+    builders = {'DenseLayer': build_dense}
+    if layer_type not in builders:
+        raise ValueError(f"Don't know how to rebuild a '{layer_type}' from a checkpoint; load it into an existing network instead")
+    return builders[layer_type]
+
+def save_weights(layers: List[Layer], path: str, dtype: str = None):
+    """
+    Writes just the parameters of each layer (plus their layer types and shapes) to a compact, versioned binary file.
+    No pickling: no Python objects, graphs, or training history end up in the file.
+    Each tensor is stored in its own dtype, unless dtype ('float64' or 'float32') says to convert them all.
+    """
+    if dtype is not None and dtype not in _DTYPES:
+        raise ValueError(f"Unknown dtype '{dtype}', must be one of {list(_DTYPES)}")
+    entries = []
+    for layer in layers:
+        tensors = [(tensor.data if dtype is None or _DTYPES[dtype] == tensor.data.typecode else array(_DTYPES[dtype], tensor.data), tuple(tensor.shape))
+                   for tensor in layer.parameters()]
+        entries.append((type(layer).__name__, _layer_config(layer), tensors))
+    with open(path, 'wb') as f:
+        _write_weights(f, entries)
+
+def _write_weights(f, entries: list):
+    """
+    Writes (layer class name, layer config, [(flat array, shape), ...]) entries to an open file, in the layout above.
+    """
+    header = bytearray(_PREAMBLE.pack(MAGIC, VERSION, 1 if _LITTLE_ENDIAN else 0, len(entries)))
+    tensors = []
+    offset_slots = []
+    for name, config, parameters in entries:
+        name, config = name.encode('utf-8'), json.dumps(config).encode('utf-8')
+        header += struct.pack('<H', len(name)) + name + struct.pack('<H', len(config)) + config + struct.pack('<H', len(parameters))
+        for data, shape in parameters:
+            header += _TENSOR.pack(data.typecode.encode('ascii'), len(shape))
+            header += struct.pack(f'<{len(shape)}I', *shape)
+            offset_slots.append(len(header))
+            header += struct.pack('<Q', 0)  # filled in below, once we know where the data starts
+            tensors.append(data)
+
+    offset = len(header)
+    for slot, data in zip(offset_slots, tensors):
+        offset += -offset % 8
+        struct.pack_into('<Q', header, slot, offset)
+        offset += len(data) * data.itemsize
+
+    f.write(header)
+    for data in tensors:
+        f.write(b'\0' * (-f.tell() % 8))
+        data.tofile(f)
+
+class WeightsCheckpoint:
+    def __init__(self, path: str, use_mmap: bool = True):
+        """
+        Opens a binary weights checkpoint and reads its header. With use_mmap, the file is memory-mapped and tensors are only read
+        (by the OS, page by page) when you actually touch them; otherwise the whole file is read into memory up front.
+        """
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if use_mmap else f.read()
+
+        magic, version, little_endian, num_layers = _PREAMBLE.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a lazytorch weights checkpoint")
+        if version > VERSION:
+            raise ValueError(f"{path} was written by a newer version of lazytorch (format version {version})")
+        if version < VERSION:
+            raise ValueError(f"{path} has format version {version}, which this version of lazytorch can't read")
+        self.version = version
+        self.views = []  # every memoryview handed out (and the slice under it), so close() can release them
+        self.byteswap = bool(little_endian) != _LITTLE_ENDIAN
+
+        self.layers = []  # one (layer type, [(typecode, shape, offset), ...]) per layer
+        self.configs = []  # and one config dict per layer
+        position = _PREAMBLE.size
+        for _ in range(num_layers):
+            (name_length,) = struct.unpack_from('<H', self.buffer, position)
+            name = bytes(self.buffer[position + 2:position + 2 + name_length]).decode('utf-8')
+            position += 2 + name_length
+            (config_length,) = struct.unpack_from('<H', self.buffer, position)
+            self.configs.append(json.loads(bytes(self.buffer[position + 2:position + 2 + config_length]).decode('utf-8')))
+            position += 2 + config_length
+            (num_tensors,) = struct.unpack_from('<H', self.buffer, position)
+            position += 2
+            tensors = []
+            for _ in range(num_tensors):
+                typecode, ndim = _TENSOR.unpack_from(self.buffer, position)
+                position += _TENSOR.size
+                shape = struct.unpack_from(f'<{ndim}I', self.buffer, position)
+                position += 4 * ndim
+                (offset,) = struct.unpack_from('<Q', self.buffer, position)
+                position += 8
+                tensors.append((typecode.decode('ascii'), shape, offset))
+            self.layers.append((name, tensors))
+
+    def view(self, layer_index: int, tensor_index: int) -> memoryview:
+        """
+        Returns a flat, zero-copy view of one tensor's raw values, straight out of the (memory-mapped) file. Views only stay
+        valid until the checkpoint is closed, which releases them (copy what you need with `tensor()` or `array(typecode, view)`).
+        """
+        raw, view = self._view(layer_index, tensor_index)
+        self.views += [view, raw]  # a memory map can't be closed while anything still points into it
+        return view
+
+    def _view(self, layer_index: int, tensor_index: int) -> tuple:
+        typecode, shape, offset = self.layers[layer_index][1][tensor_index]
+        size = 1
+        for dim in shape:
+            size *= dim
+        raw = memoryview(self.buffer)[offset:offset + size * array(typecode).itemsize]
+        return raw, raw.cast(typecode)
+
+    def tensor(self, layer_index: int, tensor_index: int) -> Tensor:
+        """
+        Copies one tensor out of the checkpoint into a regular Tensor.
+        """
+        typecode, shape, _ = self.layers[layer_index][1][tensor_index]
+        raw, view = self._view(layer_index, tensor_index)
+        with raw, view:
+            data = array(typecode, view)
+        if self.byteswap:
+            data.byteswap()
+        return Tensor._from_buffer(data, tuple(shape))
+
+    def load_into(self, layers: List[Layer]):
+        """
+        Copies every saved tensor into the matching parameters of an existing list of layers (e.g. `network.layers`), in-place.
+        Saved tensors get converted to each parameter's own dtype if they were stored as a different one.
+        """
+        assert len(layers) == len(self.layers), "Checkpoint has a different number of layers than the network"
+        for i, layer in enumerate(layers):
+            parameters = layer.parameters()
+            assert len(parameters) == len(self.layers[i][1]), f"Layer {i} has a different number of parameters than the checkpoint"
+            for j, parameter in enumerate(parameters):
+                saved = self.tensor(i, j)
+                assert tuple(parameter.shape) == saved.shape, f"Shape mismatch for parameter {j} of layer {i}"
+                parameter.data[:] = saved.data if saved.data.typecode == parameter.data.typecode else array(parameter.data.typecode, saved.data)
+
+    def to_layers(self) -> List[Layer]:
+        """
+        Rebuilds the saved layers on their own, without needing the Network class they came from. Only works for layer types it
+        knows how to build (a ValueError names the first one it doesn't); load anything else into an existing network instead.
+        """
+        return [_layer_builder(name)([self.tensor(i, j) for j in range(len(tensors))], config) for i, ((name, tensors), config) in enumerate(zip(self.layers, self.configs))]
+
+    def close(self):
+        """
+        Releases every view still handed out by `view()`, then unmaps the file.
+        """
+        for view in self.views:
+            view.release()
+        self.views = []
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+DELTA_MAGIC = b'LZTD'
+
+# delta checkpoint layout (little-endian): magic (4 bytes) | version (u16) | base file name length (u16) | base file name (utf-8)
+#   | number of tensors (u32) | for each tensor: compressed length (u64) | zlib-compressed XOR of its raw bytes with the base's
+# the layer types, shapes, and typecodes all come from the full checkpoint at the start of the chain
+_DELTA_PREAMBLE = struct.Struct('<4sHH')
+
+def _xor(a: bytes, b: bytes) -> bytes:
+    return (int.from_bytes(a, 'little') ^ int.from_bytes(b, 'little')).to_bytes(len(a), 'little')
+
+def _write_delta(f, base: str, entries: list, previous: list):
+    name = base.encode('utf-8')
+    f.write(_DELTA_PREAMBLE.pack(DELTA_MAGIC, VERSION, len(name)) + name)
+    tensors = [(data, old) for (_, _, parameters), (_, _, old_parameters) in zip(entries, previous) for (data, _), (old, _) in zip(parameters, old_parameters)]
+    f.write(struct.pack('<I', len(tensors)))
+    for data, old in tensors:
+        compressed = zlib.compress(_xor(data.tobytes(), old.tobytes()), 1)  # unchanged sign / exponent bytes XOR to zeros, which compress well
+        f.write(struct.pack('<Q', len(compressed)) + compressed)
+
+def _read_checkpoint(path: str) -> tuple:
+    """
+    Reads a full or delta checkpoint (following a delta's chain of bases back to its full checkpoint) into
+    ([(layer type, [(typecode, shape), ...]), ...], [raw bytes of each tensor, in the file's byte order], whether those need byteswapping).
+    """
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+    if magic != DELTA_MAGIC:
+        with WeightsCheckpoint(path, use_mmap=False) as checkpoint:
+            layers = [(name, [(typecode, shape) for typecode, shape, _ in tensors]) for name, tensors in checkpoint.layers]
+            raw = [bytes(checkpoint.view(i, j)) for i, (_, tensors) in enumerate(checkpoint.layers) for j in range(len(tensors))]
+            return layers, raw, checkpoint.byteswap
+
+    with open(path, 'rb') as f:
+        buffer = f.read()
+    _, version, name_length = _DELTA_PREAMBLE.unpack_from(buffer, 0)
+    if version > VERSION:
+        raise ValueError(f"{path} was written by a newer version of lazytorch (format version {version})")
+    position = _DELTA_PREAMBLE.size
+    base = buffer[position:position + name_length].decode('utf-8')
+    layers, raw, byteswap = _read_checkpoint(os.path.join(os.path.dirname(path), base))
+    (num_tensors,) = struct.unpack_from('<I', buffer, position + name_length)
+    assert num_tensors == len(raw), f"{path} doesn't match its base checkpoint {base}"
+    position += name_length + 4
+    for i in range(num_tensors):
+        (length,) = struct.unpack_from('<Q', buffer, position)
+        raw[i] = _xor(raw[i], zlib.decompress(buffer[position + 8:position + 8 + length]))
+        position += 8 + length
+    return layers, raw, byteswap
+
+class AsyncCheckpointer:
+    def __init__(self, directory: str = "checkpoints", keep_last: int = 3, keep_best: int = 0, delta: bool = False, full_every: int = 10,
+                 max_pending: int = 2):
+        """
+        Saves weights checkpoints without stalling training on disk I/O. `save()` only copies each parameter's flat buffer (a
+        memcpy), and a background thread does the writing: to a temporary file, fsynced, then atomically renamed into place, so
+        a crash mid-write never leaves a half-written checkpoint behind.
+
+        Only the last keep_last checkpoints and the keep_best with the lowest metric are kept (the most recent one always is);
+        older ones get deleted as new ones come in. With delta, checkpoints in between full ones (one every full_every) only store
+        what changed since the previous checkpoint, compressed, and loading one replays its chain. Full checkpoints are regular
+        binary weights files (see `WeightsCheckpoint`), delta ones end in .lztd. If the writer falls max_pending checkpoints
+        behind, `save()` waits for it to catch up instead of piling up copies of the weights in memory.
+        """
+        assert keep_last >= 1 or keep_best >= 1, "Must keep at least one checkpoint"
+        self.directory = directory
+        self.keep_last = keep_last
+        self.keep_best = keep_best
+        self.delta = delta
+        self.full_every = full_every
+        os.makedirs(directory, exist_ok=True)
+
+        self.checkpoints = []  # one (step, path, base path or None, metric) per checkpoint on disk, oldest first; only touched by the writer thread
+        self.last_step = None
+        self.error = None
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+
+    def save(self, layers: List[Layer], step: int, metric: float = None):
+        """
+        Snapshots the parameters of each layer (e.g. `network.layers`) as checkpoint number step, and queues it to be written.
+        Steps must go up from one checkpoint to the next. metric (e.g. the validation loss, lower is better) is what keep_best ranks by.
+        """
+        self._raise_error()
+        assert self.last_step is None or step > self.last_step, "Checkpoint steps must keep increasing"
+        self.last_step = step
+        entries = [(type(layer).__name__, _layer_config(layer), [(tensor.data[:], tuple(tensor.shape)) for tensor in layer.parameters()]) for layer in layers]
+        self.pending.put((step, metric, entries))
+
+    def flush(self):
+        """
+        Waits until every queued checkpoint is on disk.
+        """
+        self.pending.join()
+        self._raise_error()
+
+    def close(self):
+        """
+        Writes out everything still queued, then stops the writer thread.
+        """
+        if self.writer.is_alive():
+            self.pending.put(None)
+            self.writer.join()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def latest(self) -> str:
+        """
+        Path of the most recently written checkpoint (or None). Call `flush()` first to include everything that's been saved.
+        """
+        return self.checkpoints[-1][1] if self.checkpoints else None
+
+    @property
+    def best(self) -> str:
+        """
+        Path of the written checkpoint with the lowest metric (or None if none had one).
+        """
+        scored = [checkpoint for checkpoint in self.checkpoints if checkpoint[3] is not None]
+        return min(scored, key=lambda checkpoint: checkpoint[3])[1] if scored else None
+
+    @staticmethod
+    def load_into(layers: List[Layer], path: str):
+        """
+        Copies a checkpoint (full or delta) into the parameters of an existing list of layers, in-place. If those belong to a
+        Network, call `network.optimizer.sync_master_weights()` afterwards.
+        """
+        saved_layers, raw, byteswap = _read_checkpoint(path)
+        assert len(layers) == len(saved_layers), "Checkpoint has a different number of layers than the network"
+        raw = iter(raw)
+        for i, (layer, (_, tensors)) in enumerate(zip(layers, saved_layers)):
+            parameters = layer.parameters()
+            assert len(parameters) == len(tensors), f"Layer {i} has a different number of parameters than the checkpoint"
+            for j, (parameter, (typecode, shape)) in enumerate(zip(parameters, tensors)):
+                assert tuple(parameter.shape) == tuple(shape), f"Shape mismatch for parameter {j} of layer {i}"
+                data = array(typecode, next(raw))
+                if byteswap:
+                    data.byteswap()
+                parameter.data[:] = data if typecode == parameter.data.typecode else array(parameter.data.typecode, data)
+
+    def _raise_error(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _write_loop(self):
+        previous, chain_length = None, 0
+        while True:
+            item = self.pending.get()
+            try:
+                if item is None:
+                    return
+                step, metric, entries = item
+                layout = [(name, config, [(data.typecode, shape) for data, shape in parameters]) for name, config, parameters in entries]
+                is_delta = self.delta and previous is not None and chain_length < self.full_every - 1 and layout == previous[0]
+                path = os.path.join(self.directory, f"checkpoint_{step}.{'lztd' if is_delta else 'lzt'}")
+                if is_delta:
+                    self._atomic_write(path, lambda f: _write_delta(f, os.path.basename(self.latest), entries, previous[1]))
+                    chain_length += 1
+                else:
+                    self._atomic_write(path, lambda f: _write_weights(f, entries))
+                    chain_length = 0
+                self.checkpoints.append((step, path, self.latest if is_delta else None, metric))
+                previous = (layout, entries)
+                self._apply_retention()
+            except Exception as error:
+                self.error = error
+            finally:
+                self.pending.task_done()
+
+    def _atomic_write(self, path: str, write):
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+        if hasattr(os, 'O_DIRECTORY'):  # make the rename itself durable too (POSIX only)
+            directory = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+    def _apply_retention(self):
+        keep = {self.checkpoints[-1][1]}  # the next delta is based on the latest one
+        if self.keep_last:
+            keep.update(path for _, path, _, _ in self.checkpoints[-self.keep_last:])
+        scored = sorted((checkpoint for checkpoint in self.checkpoints if checkpoint[3] is not None), key=lambda checkpoint: checkpoint[3])
+        keep.update(path for _, path, _, _ in scored[:self.keep_best])
+
+        bases = {path: base for _, path, base, _ in self.checkpoints}
+        for path in list(keep):
+            while bases[path] is not None:  # deltas need every checkpoint in their chain back to the full one
+                path = bases[path]
+                keep.add(path)
+        for _, path, _, _ in self.checkpoints:
+            if path not in keep:
+                os.remove(path)
+        self.checkpoints = [checkpoint for checkpoint in self.checkpoints if checkpoint[1] in keep]
@@ -0,0 +1,235 @@
+from typing import Callable, List
+from .tensor import Tensor, _matmul, _matmul_nt, _matmul_tn, _expand, _reduce, _accumulate
+from .value import Value
+from .activations import _ACTIVATIONS
+from .layers import _dense
+from .losses import _huber, _cross_entropy, _cross_entropy_grad, _cross_entropy_target_grad, _softmax_rows
+from .profiler import profiled
+
+def _rows(expr: str, shape: tuple, out_shape: tuple) -> str:
+    """
+    Broadcasts a buffer up to the shape of the output if it's being broadcast, otherwise leaves it alone.
+    """
+    return expr if shape == out_shape else f"_expand({expr}, {shape!r}, {out_shape!r})"
+
+def _unbroadcast(expr: str, out_shape: tuple, shape: tuple) -> str:
+    return expr if shape == out_shape else f"_reduce({expr}, {out_shape!r}, {shape!r})"
+
+def _scatter(grad, positions: list, size: int) -> list:
+    """
+    Adds each entry of a view's gradient into the entry of its original's gradient that it was taken from.
+    """
+    out = [0.0] * size
+    for position, g in zip(positions, grad):
+        out[position] += g
+    return out
+
+def _emit_add(node, a, b):
+    x, y = node._dependents
+    forward = f"[p + q for p, q in zip({_rows(a, x.shape, node.shape)}, {_rows(b, y.shape, node.shape)})]"
+    return forward, [_unbroadcast("{g}", node.shape, x.shape), _unbroadcast("{g}", node.shape, y.shape)]
+
+def _emit_sub(node, a, b):
+    x, y = node._dependents
+    forward = f"[p - q for p, q in zip({_rows(a, x.shape, node.shape)}, {_rows(b, y.shape, node.shape)})]"
+    return forward, [_unbroadcast("{g}", node.shape, x.shape), "[-q for q in " + _unbroadcast("{g}", node.shape, y.shape) + "]"]
+
+def _emit_matmul(node, a, b):
+    x, y = node._dependents
+    if len(y.shape) != 2:
+        raise NotImplementedError("Can't compile batched matmul yet")
+    k, n = y.shape
+    m = x.size // k
+    return f"_matmul({a}, {b}, {m}, {k}, {n})", [f"_matmul_nt({{g}}, {b}, {m}, {n}, {k})", f"_matmul_tn({a}, {{g}}, {m}, {k}, {n})"]
+
+def _emit_activation(node, a):
+    kernels = f"_ACTIVATIONS[{node._op!r}]"
+    return f"{kernels}[0]({a}, {node._saved!r})", [f"{kernels}[1]({{out}}, {{g}}, {node._saved!r})"]
+
+def _emit_dense(node, a, w, b):
+    x, weights, _ = node._dependents
+    k, n = weights.shape
+    m = x.size // k
+    activation, alpha = node._saved
+    grad = "{g}" if activation is None else f"_ACTIVATIONS[{activation!r}][1]({{out}}, {{g}}, {alpha!r})"
+    forward = f"_dense({a}, {w}, {b}, {m}, {k}, {n}, {activation!r}, {alpha!r})"
+    return forward, [f"_matmul_nt({grad}, {w}, {m}, {n}, {k})", f"_matmul_tn({a}, {grad}, {m}, {k}, {n})", f"_reduce({grad}, ({m}, {n}), (1, {n}))"]
+
+def _emit_view(node, a):
+    # where each entry of the view sits in its original's (row-major) buffer
+    parent = node._dependents[0]
+    where = {index: position for position, index in enumerate(parent._indices())}
+    positions = f"positions_{node._id}"
+    return f"[{a}[i] for i in {positions}]", [f"_scatter({{g}}, {positions}, {parent.size})"], {positions: [where[index] for index in node._indices()]}
+
+def _emit_cross_entropy(node, a, b):
+    cols = node._dependents[0].shape[-1]
+    rows = node._dependents[0].size // cols
+    probabilities, log_sum_exps = f"_softmax_rows({a}, {rows}, {cols})[0]", f"_softmax_rows({a}, {rows}, {cols})[1]"
+    return f"_cross_entropy({a}, {b}, {rows}, {cols})[0] / {rows}", [f"[q * {{g}} / {rows} for q in _cross_entropy_grad({probabilities}, {b}, {rows}, {cols})]",
+                                                                     f"[q * {{g}} / {rows} for q in _cross_entropy_target_grad({a}, {log_sum_exps}, {cols})]"]
+
+# how to write out each op as straight-line code: given the node and the names of its parents' buffers, returns the forward
+# expression plus one gradient expression per parent (None if it never gets one), in terms of "{g}", the name of the node's
+# own gradient buffer, and "{out}", the name of its own output buffer (and optionally, constants the expressions refer to)
+_TENSOR_EMITTERS = {
+    'add': _emit_add,
+    'add_scalar': lambda node, a: (f"[p + {node._saved!r} for p in {a}]", ["{g}"]),
+    'sub': _emit_sub,
+    'sub_scalar': lambda node, a: (f"[p - {node._saved!r} for p in {a}]", ["{g}"]),
+    'matmul': _emit_matmul,
+    'mul_scalar': lambda node, a: (f"[p * {node._saved!r} for p in {a}]", [f"[q * {node._saved!r} for q in {{g}}]"]),
+    'div_scalar': lambda node, a: (f"[p / {node._saved!r} for p in {a}]", [f"[q / {node._saved!r} for q in {{g}}]"]),
+    'pow': lambda node, a: (f"[p ** {node._saved!r} for p in {a}]", [f"[{node._saved!r} * p ** ({node._saved!r} - 1) * q for p, q in zip({a}, {{g}})]"]),
+    'affine': lambda node, a: (f"[p * {node._saved[0]!r} + {node._saved[1]!r} for p in {a}]", [f"[q * {node._saved[0]!r} for q in {{g}}]"]),
+    'leaky_relu': _emit_activation,
+    'tanh': _emit_activation,
+    'sigmoid': _emit_activation,
+    'dense': _emit_dense,
+    'view': _emit_view,
+    'contiguous': lambda node, a: (a, ["{g}"]),
+    'cast': lambda node, a: (a, ["{g}"]),  # compiled steps keep every intermediate buffer as a plain list of (float64) floats anyway
+}
+_VALUE_EMITTERS = {
+    'tensor_sum': lambda node, a: (f"sum({a})", [f"[{{g}}] * {node._dependents[0].size}"]),
+    'add': lambda node, a, b: (f"{a} + {b}", ["{g}", "{g}"]),
+    'sub': lambda node, a, b: (f"{a} - {b}", ["{g}", "-{g}"]),
+    'mul': lambda node, a, b: (f"{a} * {b}", [f"{b} * {{g}}", f"{a} * {{g}}"]),
+    'div': lambda node, a, b: (f"{a} / {b}", [f"{{g}} / {b}", f"-{a} / ({b} ** 2) * {{g}}"]),
+    'add_scalar': lambda node, a: (f"{a} + {node._saved!r}", ["{g}"]),
+    'sub_scalar': lambda node, a: (f"{a} - {node._saved!r}", ["{g}"]),
+    'mul_scalar': lambda node, a: (f"{a} * {node._saved!r}", [f"{node._saved!r} * {{g}}"]),
+    'div_scalar': lambda node, a: (f"{a} / {node._saved!r}", [f"{{g}} / {node._saved!r}"]),
+    'mse': lambda node, a, b: (f"sum([(p - q) * (p - q) for p, q in zip({a}, {b})]) / {len(node._saved)}",
+                               [f"[(p - q) * (2 * {{g}} / {len(node._saved)}) for p, q in zip({a}, {b})]", f"[(q - p) * (2 * {{g}} / {len(node._saved)}) for p, q in zip({a}, {b})]"]),
+    'squared_error': lambda node, a, b: (f"sum([(p - q) * (p - q) for p, q in zip({a}, {b})])",
+                                         [f"[(p - q) * (2 * {{g}}) for p, q in zip({a}, {b})]", f"[(q - p) * (2 * {{g}}) for p, q in zip({a}, {b})]"]),
+    'mae': lambda node, a, b: (f"sum([abs(p - q) for p, q in zip({a}, {b})]) / {len(node._saved)}",
+                               [f"[((p > q) - (p < q)) * {{g}} / {len(node._saved)} for p, q in zip({a}, {b})]", f"[((q > p) - (q < p)) * {{g}} / {len(node._saved)} for p, q in zip({a}, {b})]"]),
+    'huber': lambda node, a, b: (f"_huber([p - q for p, q in zip({a}, {b})], {node._saved[1]!r}) / {len(node._saved[0])}",
+                                 [f"[max(-{node._saved[1]!r}, min({node._saved[1]!r}, p - q)) * {{g}} / {len(node._saved[0])} for p, q in zip({a}, {b})]",
+                                  f"[-max(-{node._saved[1]!r}, min({node._saved[1]!r}, p - q)) * {{g}} / {len(node._saved[0])} for p, q in zip({a}, {b})]"]),
+    'cross_entropy': _emit_cross_entropy,
+    'sum': lambda node, *xs: (f"sum([{', '.join(xs)}]) + {node._saved!r}", ["{g}"] * len(xs)),
+    'dot': lambda node, *xys: (f"sum([{', '.join(f'{x} * {y}' for x, y in zip(xys[:len(xys) // 2], xys[len(xys) // 2:]))}])",
+                               [f"{y} * {{g}}" for y in xys[len(xys) // 2:]] + [f"{x} * {{g}}" for x in xys[:len(xys) // 2]]),
+    'dot_scalar': lambda node, *xs: (f"sum([{', '.join(f'{x} * {c!r}' for x, c in zip(xs, node._saved))}])", [f"{c!r} * {{g}}" for c in node._saved]),
+}
+
+def trace(forward_and_loss: Callable[[Tensor, Tensor], Value], parameters: List[Tensor], inp: Tensor, target: Tensor):
+    """
+    Runs forward_and_loss once on example inputs, then turns the computation graph it built into the source of a straight-line
+    Python function `step(inp, target) -> loss`, which replays the same forward pass, loss, and backprop over flat buffers and adds
+    the gradients into each parameter's `.grad` buffer. Returns the compiled function and its source code.
+
+    Every leaf that isn't a parameter, the input, or the target is baked into the program as a constant.
+    """
+    loss = forward_and_loss(inp, target)
+    assert isinstance(loss, Value), "Can only compile a step that ends in a single loss Value"
+
+    nodes = {}
+    pending = [loss]
+    while pending:
+        node = pending.pop()
+        if node._id not in nodes:
+            nodes[node._id] = node
+            pending.extend(node._dependents)
+    order = [nodes[node_id] for node_id in sorted(nodes)]  # creation order is forward order
+
+    parameter_ids = {id(p) for p in parameters}
+    names = {node._id: f"v{i}" for i, node in enumerate(order)}
+    namespace = {'_matmul': _matmul, '_matmul_nt': _matmul_nt, '_matmul_tn': _matmul_tn, '_expand': _expand, '_reduce': _reduce,
+                 '_accumulate': _accumulate, '_scatter': _scatter,
+                 '_ACTIVATIONS': _ACTIVATIONS, '_dense': _dense, '_huber': _huber, '_cross_entropy': _cross_entropy,
+                 '_cross_entropy_grad': _cross_entropy_grad, '_cross_entropy_target_grad': _cross_entropy_target_grad, '_softmax_rows': _softmax_rows}
+    lines = []
+    grad_exprs = {}  # node id -> gradient expression for each parent, for nodes that have a parameter somewhere upstream
+    needs_grad = set()
+
+    # forward pass, in creation order
+    for node in order:
+        name = names[node._id]
+        if node is inp:
+            lines.append(f"{name} = inp._values()")
+        elif node is target:
+            lines.append(f"{name} = target._values()")
+        elif id(node) in parameter_ids:
+            assert node._is_whole_buffer(), "Parameters must be regular Tensors, not views"
+            namespace[f"param_{name}"] = node
+            lines.append(f"{name} = param_{name}.data")
+            needs_grad.add(node._id)
+        elif not node._op:
+            namespace[f"const_{name}"] = node.value if isinstance(node, Value) else node._values()
+            lines.append(f"{name} = const_{name}")
+        else:
+            emitters = _VALUE_EMITTERS if isinstance(node, Value) else _TENSOR_EMITTERS
+            if node._op not in emitters:
+                raise NotImplementedError(f"Can't compile the '{node._op}' op yet")
+            forward, grads, *constants = emitters[node._op](node, *[names[parent._id] for parent in node._dependents])
+            for constant in constants:
+                namespace.update(constant)
+            lines.append(f"{name} = {forward}")
+            if any(parent._id in needs_grad for parent in node._dependents):
+                needs_grad.add(node._id)
+                grad_exprs[node._id] = grads
+
+    # backprop, in reverse creation order, only along paths that lead back to a parameter
+    has_grad = {loss._id}
+    lines.append(f"g{names[loss._id]} = 1.0")
+    for node in reversed(order):
+        if node._id not in grad_exprs or node._id not in has_grad:
+            continue
+        for parent, grad in zip(node._dependents, grad_exprs[node._id]):
+            if parent._id not in needs_grad or grad is None:
+                continue
+            parent_grad, expr = f"g{names[parent._id]}", grad.replace("{g}", f"g{names[node._id]}").replace("{out}", names[node._id])
+            if parent._id not in has_grad:
+                has_grad.add(parent._id)
+                lines.append(f"{parent_grad} = {expr}")
+            elif isinstance(parent, Value):
+                lines.append(f"{parent_grad} = {parent_grad} + {expr}")
+            else:
+                lines.append(f"{parent_grad} = [p + q for p, q in zip({parent_grad}, {expr})]")
+
+    for node in order:
+        if id(node) in parameter_ids and node._id in has_grad:
+            lines.append(f"_accumulate(param_{names[node._id]}.grad, g{names[node._id]})")
+    lines.append(f"return {names[loss._id]}")
+
+    source = "def step(inp, target):\n" + "\n".join("    " + line for line in lines) + "\n"
+    exec(compile(source, "<lazytorch compiled step>", "exec"), namespace)
+    return namespace["step"], source
+
+class CompiledStep:
+    def __init__(self, forward_and_loss: Callable[[Tensor, Tensor], Value], parameters: List[Tensor]):
+        """
+        A reusable, compiled forward + loss + backprop step. The first call for each pair of input / target shapes traces the
+        real step once; every call after that replays the generated program, without building any `Value`s, `Tensor`s, or graph.
+
+        Only works for steps whose ops don't depend on the data (no Python control flow on values), which covers fixed-architecture MLPs.
+        """
+        self.forward_and_loss = forward_and_loss
+        self.parameters = parameters
+        self.programs = {}
+
+    @profiled('CompiledStep', 'step')
+    def __call__(self, inp: Tensor, target: Tensor) -> float:
+        """
+        Runs the step on a new batch, adding the gradients into every parameter's `.grad` buffer, and returns the loss.
+        """
+        key = (inp.shape, target.shape)
+        if key not in self.programs:
+            self.programs[key] = trace(self.forward_and_loss, self.parameters, inp, target)
+        return self.programs[key][0](inp, target)
+
+    def source(self, inp_shape: tuple, target_shape: tuple) -> str:
+        """
+        Returns the generated Python source for the given input / target shapes (once that step has been traced).
+        """
+        return self.programs[(inp_shape, target_shape)][1]
+
+    def __getstate__(self):
+        # generated functions can't be pickled, so they just get retraced after loading
+        state = self.__dict__.copy()
+        state['programs'] = {}
+        return state
@@ -0,0 +1,263 @@
+from abc import ABC, abstractmethod
+from array import array
+from typing import Callable, Iterable, Iterator, Sequence, Tuple
+from .tensor import Tensor
+from multiprocessing import shared_memory
+import multiprocessing
+import queue
+import random
+import threading
+
+def _row(sample) -> list:
+    """
+    Turns one input or target (a number, or a list / tuple of numbers) into a Tensor row.
+    """
+    return list(sample) if isinstance(sample, (list, tuple)) else [sample]
+
+class Dataset(ABC):
+    """
+    Map-style dataset: knows its length and can fetch any (input, target) sample by index, so it can be shuffled by index.
+    """
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def __getitem__(self, index: int) -> Tuple:
+        pass
+
+class TensorDataset(Dataset):
+    def __init__(self, inputs: Sequence, targets: Sequence):
+        """
+        In-memory dataset over two parallel sequences of inputs and targets (numbers or lists of numbers). Nothing is copied.
+        """
+        assert len(inputs) == len(targets), "Must have exactly one target per input"
+        self.inputs = inputs
+        self.targets = targets
+
+    def __len__(self) -> int:
+        return len(self.inputs)
+
+    def __getitem__(self, index: int) -> Tuple:
+        return self.inputs[index], self.targets[index]
+
+class SharedDataset(Dataset):
+    def __init__(self, inputs: Sequence, targets: Sequence):
+        """
+        Read-only, in-memory dataset whose inputs and targets are copied once into a single block of shared memory, so any number
+        of worker processes can read the same copy of it. Pickling one (e.g. to send it to a worker) only sends the block's name,
+        and the unpickled dataset attaches to the same memory. Call `close()` when you're done with it, in the process that made it.
+        """
+        assert len(inputs) == len(targets), "Must have exactly one target per input"
+        assert len(inputs) > 0, "Can't share an empty dataset"
+        self.length = len(inputs)
+        self.input_size, self.target_size = len(_row(inputs[0])), len(_row(targets[0]))
+        self.memory = shared_memory.SharedMemory(create=True, size=8 * self.length * (self.input_size + self.target_size))
+        self.owner = True
+        self._attach()
+        self.values[:self.length * self.input_size] = array('d', [x for sample in inputs for x in _row(sample)])
+        self.values[self.length * self.input_size:] = array('d', [y for sample in targets for y in _row(sample)])
+
+    def _attach(self):
+        self.values = self.memory.buf.cast('d')  # all the inputs row by row, then all the targets row by row
+        self.targets_start = self.length * self.input_size
+
+    def __getstate__(self):
+        return (self.memory.name, self.length, self.input_size, self.target_size)
+
+    def __setstate__(self, state):
+        name, self.length, self.input_size, self.target_size = state
+        self.memory = shared_memory.SharedMemory(name=name)
+        self.owner = False
+        self._attach()
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int) -> Tuple:
+        if not -self.length <= index < self.length:
+            raise IndexError(f"Index {index} is out of range for a dataset of {self.length} samples")
+        index %= self.length
+        start = self.targets_start + index * self.target_size
+        return self.values[index * self.input_size:(index + 1) * self.input_size].tolist(), self.values[start:start + self.target_size].tolist()
+
+    def close(self):
+        """
+        Detaches from the shared memory, and frees it if this is the process that created it.
+        """
+        self.values.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class IterableDataset:
+    def __init__(self, source: Callable[[], Iterable[Tuple]]):
+        """
+        Streaming dataset for data that doesn't fit comfortably in lists. source is called once per epoch and must return a fresh
+        iterable of (input, target) samples, e.g. a generator function. Samples are only pulled as batches need them.
+        """
+        self.source = source
+
+    def __iter__(self) -> Iterator[Tuple]:
+        return iter(self.source())
+
+class CSVDataset(IterableDataset):
+    def __init__(self, path: str, num_inputs: int, skip_header: bool = False):
+        """
+        Streams samples from a CSV file of numbers, line by line: the first num_inputs columns are the input, the rest the target.
+        """
+        self.path = path
+        self.num_inputs = num_inputs
+        self.skip_header = skip_header
+        super().__init__(self._read)
+
+    def _read(self) -> Iterator[Tuple]:
+        with open(self.path) as f:
+            if self.skip_header:
+                next(f, None)
+            for line in f:
+                if line.strip():
+                    values = [float(value) for value in line.split(',')]
+                    yield values[:self.num_inputs], values[self.num_inputs:]
+
+class DataLoader:
+    def __init__(self, dataset, batch_size: int = 32, shuffle: bool = True, drop_last: bool = False, prefetch: int = 0,
+                 prefetch_in_process: bool = False, shuffle_buffer: int = 1024):
+        """
+        Yields (inputs, targets) batch Tensors, one sample per row, lazily from a generator.
+
+        For map-style datasets, shuffling shuffles a list of indices in place each epoch instead of copying the data. Streaming
+        (iterable) datasets can't be indexed, so they're shuffled through a buffer of shuffle_buffer samples instead.
+        With prefetch > 0, up to that many upcoming batches get built on a background thread (or a background process, with
+        prefetch_in_process, which sidesteps the GIL but has to pickle every batch back) while the current step runs. Starting
+        a new epoch stops the last one's producer first (and ends that epoch, if it was abandoned partway), so it's never still
+        reading the order while it gets reshuffled.
+        """
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.prefetch = prefetch
+        self.prefetch_in_process = prefetch_in_process
+        self.shuffle_buffer = shuffle_buffer
+        self.order = list(range(len(dataset))) if isinstance(dataset, Dataset) else None
+        self._producer = None  # (producer, stop event) of the latest prefetching epoch
+
+    def __len__(self) -> int:
+        assert self.order is not None, "Streaming datasets don't have a length"
+        return len(self.order) // self.batch_size if self.drop_last else -(-len(self.order) // self.batch_size)
+
+    def _samples(self) -> Iterator[Tuple]:
+        if self.order is not None:
+            return (self.dataset[i] for i in self.order)
+        return self._buffered_shuffle(iter(self.dataset)) if self.shuffle else iter(self.dataset)
+
+    def _buffered_shuffle(self, samples: Iterator[Tuple]) -> Iterator[Tuple]:
+        buffer = []
+        for sample in samples:
+            if len(buffer) < self.shuffle_buffer:
+                buffer.append(sample)
+                continue
+            index = random.randrange(len(buffer))
+            yield buffer[index]
+            buffer[index] = sample
+        random.shuffle(buffer)
+        yield from buffer
+
+    def _batches(self) -> Iterator[Tuple[Tensor, Tensor]]:
+        inputs, targets = [], []
+        for inp, target in self._samples():
+            inputs.append(_row(inp))
+            targets.append(_row(target))
+            if len(inputs) == self.batch_size:
+                yield Tensor(inputs), Tensor(targets)
+                inputs, targets = [], []
+        if inputs and not self.drop_last:
+            yield Tensor(inputs), Tensor(targets)
+
+    def __iter__(self) -> Iterator[Tuple[Tensor, Tensor]]:
+        self._stop_producer()
+        if self.order is not None and self.shuffle:
+            random.shuffle(self.order)  # shuffled here, in the main process, so a background process sees a fresh order every epoch
+        if self.prefetch <= 0:
+            return self._batches()
+        return self._prefetched()
+
+    def _prefetched(self) -> Iterator[Tuple[Tensor, Tensor]]:
+        if self.prefetch_in_process:
+            batches, stop = multiprocessing.Queue(maxsize=self.prefetch), multiprocessing.Event()
+            seed = random.random()  # a forked process would otherwise replay the exact same random state every epoch
+            producer = multiprocessing.Process(target=_produce, args=(self._batches, batches, stop, seed), daemon=True)
+        else:
+            batches, stop = queue.Queue(maxsize=self.prefetch), threading.Event()
+            producer = threading.Thread(target=_produce, args=(self._batches, batches, stop), daemon=True)
+        self._stop_producer()  # in case two epochs got started before either one pulled its first batch
+        self._producer = (producer, stop)
+        producer.start()
+
+        try:
+            while not stop.is_set():  # a newer epoch stops this one's producer, which ends this one too
+                try:
+                    batch = batches.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                if batch is None:  # end of the epoch
+                    break
+                if isinstance(batch, BaseException):
+                    raise batch
+                yield batch
+        finally:
+            if self._producer is not None and self._producer[0] is producer:
+                self._stop_producer()  # if the loop was cut short (a break, or an error), the producer would otherwise wait on a full queue forever
+
+    def _stop_producer(self):
+        """
+        Stops the latest epoch's background producer, if it's still running, and waits for it to quit.
+        """
+        if self._producer is None:
+            return
+        producer, stop = self._producer
+        self._producer = None
+        stop.set()
+        if self.prefetch_in_process:
+            producer.join(timeout=1.0)  # it has its own copy of the order, so it's only waited on for so long
+            if producer.is_alive():
+                producer.terminate()
+        else:
+            producer.join()  # it reads self.order, so it has to be done before that gets reshuffled
+
+def _put(batches, item, stop) -> bool:
+    """
+    Puts item on the queue, waiting for room in short rounds so it notices when the consumer has stopped. Returns False if it has.
+    """
+    while not stop.is_set():
+        try:
+            batches.put(item, timeout=0.05)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def _produce(make_batches: Callable[[], Iterator], batches, stop, seed: float = None):
+    """
+    Background producer: builds batches ahead of time and puts them on the queue, then None to mark the end (or whatever error happened).
+    Quits early once stop gets set.
+    """
+    if seed is not None:
+        random.seed(seed)
+    try:
+        for batch in make_batches():
+            if not _put(batches, batch, stop):
+                break
+        else:
+            _put(batches, None, stop)
+    except BaseException as error:
+        _put(batches, error, stop)
+    if stop.is_set() and hasattr(batches, 'cancel_join_thread'):
+        batches.cancel_join_thread()  # a process shouldn't wait on exit to flush batches nobody's going to read
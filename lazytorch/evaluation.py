@@ -0,0 +1,85 @@
+from array import array
+from typing import Callable, List, Sequence, Union
+from .network import Network
+import multiprocessing
+import pickle
+
+class CheckpointEvaluation:
+    def __init__(self, checkpoint: str, predictions: array, targets: Sequence[float] = None):
+        """
+        Predictions of one checkpoint over the whole evaluation grid, plus error metrics against the targets (if there are any).
+        For multi-output networks, predictions (and targets) are flat, row by row: every output for the first grid point, then the second, and so on.
+        """
+        self.checkpoint = checkpoint
+        self.predictions = predictions
+        self.mse = None
+        self.max_error = None
+        if targets is not None:
+            errors = [p - t for p, t in zip(predictions, targets)]
+            self.mse = sum([e * e for e in errors]) / len(errors)
+            self.max_error = max([abs(e) for e in errors])
+
+    def __repr__(self):
+        return f"CheckpointEvaluation({self.checkpoint!r}, mse={self.mse}, max_error={self.max_error})"
+
+def load_network(checkpoint: str, network_factory: Callable[[], Network] = None) -> Network:
+    """
+    Loads a network from either a pickled `.pkl` checkpoint, or a binary weights checkpoint (which needs a network_factory
+    that builds an untrained network with the same architecture to load the weights into).
+    """
+    if checkpoint.endswith('.pkl'):
+        with open(checkpoint, 'rb') as f:
+            return pickle.load(f)
+    assert network_factory is not None, "Need a network_factory to load a weights-only checkpoint into"
+    network = network_factory()
+    network.load_weights(checkpoint)
+    return network
+
+def _flatten(outputs) -> list:
+    """
+    One float per single-output prediction (or target) stays as is; lists of outputs get flattened into one row after another.
+    """
+    flat = []
+    for output in outputs:
+        if isinstance(output, (list, tuple)):
+            flat.extend(output)
+        else:
+            flat.append(output)
+    return flat
+
+_worker_state = {}  # the grid, targets, and settings each worker process evaluates against, set once when the pool starts
+
+def _init_worker(grid: list, targets: list, network_factory, chunk_size: int):
+    _worker_state.update(grid=grid, targets=targets, network_factory=network_factory, chunk_size=chunk_size)
+
+def _evaluate(checkpoint: str) -> CheckpointEvaluation:
+    network = load_network(checkpoint, _worker_state['network_factory'])
+    predictions = array('d', _flatten(network.predict(_worker_state['grid'], _worker_state['chunk_size'])))
+    return CheckpointEvaluation(checkpoint, predictions, _worker_state['targets'])
+
+def evaluate_checkpoints(checkpoints: List[str], grid: Sequence[float], targets: Union[Sequence[float], Callable[[float], float]] = None,
+                         network_factory: Callable[[], Network] = None, processes: int = None, chunk_size: int = 256) -> List[CheckpointEvaluation]:
+    """
+    Loads and evaluates every checkpoint over the same grid of inputs, spreading the checkpoints over a pool of processes
+    (one per core by default). Returns one `CheckpointEvaluation` per checkpoint, in the same order as the checkpoints.
+
+    targets can be a list of the true outputs for each grid point (a list of floats per point for multi-output networks), or a function to calculate them; either way, each result
+    gets its MSE and max absolute error against them. network_factory is only needed for binary weights checkpoints, and must be
+    picklable (e.g. the network class itself). An empty grid (or targets that don't match it) raises a ValueError.
+    """
+    grid = list(grid)
+    if not grid:
+        raise ValueError("Need at least one grid point to evaluate the checkpoints over")
+    if callable(targets):
+        targets = [targets(x) for x in grid]
+    if targets is not None:
+        targets = _flatten(targets)
+        if not targets or len(targets) % len(grid):
+            raise ValueError(f"Got {len(targets)} targets for {len(grid)} grid points, need the same number of outputs for each")
+
+    if processes == 1 or len(checkpoints) <= 1:
+        _init_worker(grid, targets, network_factory, chunk_size)
+        return [_evaluate(checkpoint) for checkpoint in checkpoints]
+
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(grid, targets, network_factory, chunk_size)) as pool:
+        return pool.map(_evaluate, checkpoints, chunksize=1)
@@ -1,9 +1,19 @@
 from abc import ABC, abstractmethod
-from .tensor import Tensor
-from .value import Value
+from .tensor import Tensor, _matmul, _matmul_nt, _matmul_tn, _reduce, _typecode, _BACKPROPS
+from .activations import _ACTIVATIONS
+from .profiler import profiled
+from .lazy import deferrable
+from . import autograd, profiler
+from .autograd import backprop, is_grad_enabled, set_grad_enabled, no_grad
+from array import array
 import random
 
 class Layer(ABC):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if '__call__' in cls.__dict__:
+            cls.__call__ = deferrable(profiled()(cls.__call__))  # every layer's forward pass shows up in the profiler under its own name, and can be deferred in lazy mode
+
     @abstractmethod
     def __call__(self, x: Tensor) -> Tensor:
         pass
@@ -22,16 +32,60 @@ class Layer(ABC):
         """
         pass
 
+    def parameters(self) -> list:
+        """
+        Returns every trainable parameter Tensor of this layer, so optimizers can update them. No parameters by default.
+        """
+        return []
+
+def _dense(x: array, weights: array, biases: array, m: int, k: int, n: int, activation: str = None, alpha: float = None, typecode: str = 'd') -> array:
+    """
+    Forward pass of a whole dense layer over flat buffers: activation(x * weights + biases), with the biases added to every row.
+    Everything is computed in float64, and only the final output is stored with the given typecode.
+    """
+    out = _matmul(x, weights, m, k, n)
+    if activation is None:
+        return array(typecode, [value + bias for value, bias in zip(out, biases * m)])
+    return array(typecode, _ACTIVATIONS[activation][0]([value + bias for value, bias in zip(out, biases * m)], alpha))
+
+def _dense_backprop(out):
+    x, weights, biases = out._dependents
+    activation, alpha = out._saved
+    grad = out.grad if activation is None else _ACTIVATIONS[activation][1](out.data, out.grad, alpha)  # back through the activation first
+    k, n = weights.shape
+    m = x.size // k  # any leading dims (batch, sequence, ...) are just more rows
+    x._add_grad(_matmul_nt(grad, weights._values(), m, n, k))  # weights (and biases) can be views too, like a transpose
+    weights._add_grad(_matmul_tn(x._values(), grad, m, k, n))
+    biases._add_grad(_reduce(grad, (m, n), biases.shape))
+
+_BACKPROPS['dense'] = _dense_backprop
+
+def _dense_node(x: Tensor, weights: Tensor, biases: Tensor, activation: str = None, alpha: float = None) -> Tensor:
+    """
+    Builds the single fused node for activation(x * weights + biases), over any number of leading dims of x.
+    """
+    assert x.shape[-1] == weights.shape[0], "Input shape must match the shape of the weights"
+    k, n = weights.shape
+    m = x.size // k
+    output = Tensor._from_buffer(_dense(x._values(), weights._values(), biases._values(), m, k, n, activation, alpha, _typecode(x, weights, biases)), x.shape[:-1] + (n,))
+    return output._track('dense', (x, weights, biases), (activation, alpha))
+
 class DenseLayer(Layer):
-    def __init__(self, input_size, output_size) -> None:
-        self.weights = Tensor([[Value(random.uniform(-0.1, 0.1)) for _ in range(output_size)] for _ in range(input_size)])  # by default, initialize weights to random values       
-        self.biases = Tensor([[Value(0.0) for _ in range(output_size)]])  # biases initialized to zero
+    def __init__(self, input_size, output_size, activation: str = None, alpha: float = 0.01) -> None:
+        """
+        A fully connected layer. Optionally fuses an activation ('relu', 'leaky_relu' with the given alpha, 'tanh', or 'sigmoid') into
+        the same node as the matmul and bias, so the whole layer is a single node whose backprop only needs its own output.
+        """
+        assert activation in (None, 'relu', 'leaky_relu', 'tanh', 'sigmoid'), f"Unknown activation '{activation}'"
+        if activation == 'relu':
+            activation, alpha = 'leaky_relu', 0.0
+        self.activation = activation
+        self.alpha = alpha
+        self.weights = Tensor([[random.uniform(-0.1, 0.1) for _ in range(output_size)] for _ in range(input_size)])  # by default, initialize weights to random values       
+        self.biases = Tensor([[0.0 for _ in range(output_size)]])  # biases initialized to zero
 
     def __call__(self, x: Tensor) -> Tensor:
-        assert x.shape[1] == self.weights.shape[0], "Input shape must match the shape of the weights"        
-        output = x * self.weights        
-        output = output + self.biases
-        return output
+        return _dense_node(x, self.weights, self.biases, self.activation, self.alpha)
     
     def zero(self):
         """
@@ -40,18 +94,70 @@ class DenseLayer(Layer):
         self.weights.zero()
         self.biases.zero()
 
+    def parameters(self) -> list:
+        return [self.weights, self.biases]
+
     def apply_gradients(self, lr: float):
         """
         Subtracts the gradients of both the weights and biases from themselves, scaled by the learning rate.
         """
-        weights_gradients = self.weights.gradient()
-        biases_gradients = self.biases.gradient()
+        # below modifies the flat weight buffers directly and in-place, straight from the gradient buffers, without messing up the gradient computation graph
+        for parameter in self.parameters():
+            parameter.data[:] = array(parameter.data.typecode, [w - lr * g for w, g in zip(parameter.data, parameter.grad)])
+
+def _checkpoint_backprop(out):
+    # rebuild the segment's graph from a fresh copy of its input, and backprop the output's gradients through it
+    x, segment = out._dependents[0], out._saved
+    inp = Tensor._from_buffer(x._values(), x.shape)  # a new leaf, so the recomputed graph stops here
+    previous, hooks = is_grad_enabled(), (autograd._profiler, profiler._active)
+    set_grad_enabled(True)
+    autograd._profiler = profiler._active = None  # the recomputation (forward and backward) just counts towards this node's own backward time
+    try:
+        output = segment._forward(inp)
+        backprop([output], [Tensor._from_buffer(out.grad, out.shape)])
+    finally:
+        set_grad_enabled(previous)
+        autograd._profiler, profiler._active = hooks
+    x._add_grad(inp.grad)
 
-        # below modifies the weights directly and in-place, without messing up the gradient computation graph (although since we should zero out grads right after, it shouldn't matter)
-        for i in range(self.weights.shape[0]):
-            for j in range(self.weights.shape[1]):
-                self.weights.data[i][j].value -= lr * weights_gradients.data[i][j].value
+_BACKPROPS['checkpoint'] = _checkpoint_backprop
 
-        for i in range(self.biases.shape[0]):
-            for j in range(self.biases.shape[1]):
-                self.biases.data[i][j].value -= lr * biases_gradients.data[i][j].value
+class Checkpointed(Layer):
+    def __init__(self, *segment) -> None:
+        """
+        Activation checkpointing for a segment of layers (plus activations, or any other functions of one Tensor), applied in order.
+        The forward pass runs without building a graph, so only the segment's input and output stay alive until backprop, which
+        recomputes the segment's forward pass to rebuild its graph just in time. Costs one extra forward pass of the segment per
+        step, in exchange for none of its intermediate outputs being kept around in between:
+
+            layers = [Checkpointed(DenseLayer(1, 32), Leaky_ReLU, DenseLayer(32, 32), Leaky_ReLU), DenseLayer(32, 1)]
+
+        Everything in the segment has to give the same outputs when it's run again, which every built-in layer and activation does.
+        """
+        self.segment = list(segment)
+
+    def _layers(self) -> list:
+        return [layer for layer in self.segment if isinstance(layer, Layer)]
+
+    def _forward(self, x: Tensor) -> Tensor:
+        for fn in self.segment:
+            x = fn(x)
+        return x
+
+    def __call__(self, x: Tensor) -> Tensor:
+        if not is_grad_enabled():
+            return self._forward(x)
+        with no_grad():
+            output = self._forward(x)
+        return Tensor._from_buffer(output._values(), output.shape)._track('checkpoint', (x,), self)
+
+    def zero(self):
+        for layer in self._layers():
+            layer.zero()
+
+    def parameters(self) -> list:
+        return [parameter for layer in self._layers() for parameter in layer.parameters()]
+
+    def apply_gradients(self, lr: float):
+        for layer in self._layers():
+            layer.apply_gradients(lr)
@@ -0,0 +1,349 @@
+from typing import Callable, List
+from .autograd import next_node_id
+from .tensor import Tensor
+from .value import Value, _BACKPROPS
+from array import array
+from collections import Counter
+import functools
+import sys
+
+# activation functions that can be folded into the dense layer (or matmul + bias) feeding them, by name -> (activation, alpha)
+_FUSABLE_ACTIVATIONS = {
+    'Leaky_ReLU': lambda args, kwargs: ('leaky_relu', args[1] if len(args) > 1 else kwargs.get('alpha', 0.01)),
+    'ReLU': lambda args, kwargs: ('leaky_relu', 0.0),
+    'Tanh': lambda args, kwargs: ('tanh', None),
+    'Sigmoid': lambda args, kwargs: ('sigmoid', None),
+}
+_SCALAR_OPS = ('__add__', '__sub__', '__mul__', '__truediv__')
+
+class LazyTensor:
+    def __init__(self, op, args: tuple, kwargs: dict = None):
+        """
+        One deferred op in lazy mode: the name of the `Tensor` method (or the function) to call, and what to call it on
+        (other LazyTensors, regular Tensors, or constants). Nothing is computed until a result is actually needed: `.value`,
+        `.backprop()`, printing, and so on. See `materialize` for what happens then.
+        """
+        self.op = op
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.result = None  # the eager Tensor (or Value) this turned into, once it's been evaluated
+        self._id = next_node_id()
+
+    def _defer(self, op: str, *args):
+        return LazyTensor(op, (self,) + args)
+
+    def __add__(self, other):
+        return self._defer('__add__', other)
+
+    def __radd__(self, other):
+        return self._defer('__add__', other)
+
+    def __sub__(self, other):
+        return self._defer('__sub__', other)
+
+    def __rsub__(self, other):
+        if isinstance(other, (int, float)):
+            return self._defer('__mul__', -1)._defer('__add__', other)
+        return LazyTensor('__sub__', (other, self))
+
+    def __mul__(self, other):
+        return self._defer('__mul__', other)
+
+    def __rmul__(self, other):
+        if isinstance(other, (int, float)):
+            return self._defer('__mul__', other)
+        return LazyTensor('__mul__', (other, self))  # a Tensor times a Tensor is a matmul, so the order matters
+
+    def __matmul__(self, other):
+        return self._defer('__mul__', other)  # a Tensor times a Tensor is already a matmul
+
+    def __rmatmul__(self, other):
+        return LazyTensor('__mul__', (other, self))
+
+    def __truediv__(self, other):
+        return self._defer('__truediv__', other)
+
+    def __pow__(self, other):
+        return self._defer('__pow__', other)
+
+    def sum(self):
+        return self._defer('sum')
+
+    def transpose(self, dim0: int = -2, dim1: int = -1):
+        return self._defer('transpose', dim0, dim1)
+
+    @property
+    def T(self):
+        return self._defer('T')
+
+    def reshape(self, *shape):
+        return self._defer('reshape', *shape)
+
+    def expand(self, *shape):
+        return self._defer('expand', *shape)
+
+    def __getitem__(self, key):
+        return self._defer('__getitem__', key)
+
+    def contiguous(self):
+        return self._defer('contiguous')
+
+    def evaluate(self):
+        """
+        Returns the eager `Tensor` (or `Value`) this expression turns into, evaluating it (and whatever it needs) if it hasn't been yet.
+        """
+        if self.result is None:
+            materialize([self])
+        return self.result
+
+    @property
+    def value(self):
+        result = self.evaluate()
+        return result.value if isinstance(result, Value) else result.tolist()
+
+    @property
+    def shape(self) -> tuple:
+        return self.evaluate().shape
+
+    def tolist(self):
+        return self.evaluate().tolist()
+
+    def item(self) -> float:
+        return self.evaluate().item()
+
+    def gradient(self):
+        return self.evaluate().gradient()
+
+    def backprop(self, seed=None, retain_graph: bool = False):
+        self.evaluate().backprop(seed, retain_graph)
+
+    def __str__(self):
+        return str(self.evaluate())
+
+def lazy(tensor: Tensor) -> LazyTensor:
+    """
+    Opts a Tensor into lazy mode: every op on what this returns (including activations, losses, and layers) just records itself,
+    and the whole expression only gets optimized and evaluated once something needs its result.
+
+        loss = MSE_Loss(network.forward(lazy(batch_x)), batch_y)
+        loss.backprop()  # CSE, fusion, and pruning happen here, then the eager graph is built and backpropped
+    """
+    leaf = LazyTensor('leaf', (tensor,))
+    leaf.result = tensor
+    return leaf
+
+def deferrable(fn: Callable) -> Callable:
+    """
+    Decorator for functions (and layer calls) that take Tensors: called on any LazyTensor, they record a deferred call instead of running.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if any(isinstance(arg, LazyTensor) for arg in args):
+            return LazyTensor(fn, args, kwargs)
+        return fn(*args, **kwargs)
+    return wrapper
+
+def _key(arg):
+    """
+    What an input contributes to an op's identity for common-subexpression elimination.
+    """
+    if isinstance(arg, LazyTensor):
+        return ('value', id(arg.result)) if arg.result is not None else ('node', arg._id)
+    if isinstance(arg, (int, float, str, slice, tuple, type(None))):
+        return ('constant', type(arg).__name__, repr(arg))
+    return ('value', id(arg))  # Tensors, Values, layers: only the exact same object counts as the same input
+
+def _call(op):
+    if op == 'T':
+        return lambda x: x.T
+    if isinstance(op, str):
+        return lambda x, *args, **kwargs: getattr(x, op)(*args, **kwargs)
+    return op
+
+def _affine(x, ops: tuple, extra_scale: float = 1.0):
+    """
+    Applies a whole chain of scalar adds / subtracts / multiplies / divides as one `x * scale + shift`. Multiplies and divides are
+    folded into one numerator and one denominator, so e.g. multiplying by n and then dividing by n cancels out exactly.
+    """
+    numerator, denominator, shift = extra_scale, 1.0, 0.0
+    for op, constant in ops:
+        if op == '__add__':
+            shift += constant
+        elif op == '__sub__':
+            shift -= constant
+        elif op == '__mul__':
+            numerator *= constant
+            shift *= constant
+        else:
+            denominator *= constant
+            shift /= constant
+    scale = numerator / denominator
+    if isinstance(x, Tensor):
+        return x._affine(scale, shift)
+    if scale != 1.0:
+        x = x * scale
+    return x + shift if shift != 0.0 else x
+
+def _squared_error(a, b, ops: tuple = ()):
+    """
+    ((a - b) ** 2).sum(), followed by an optional chain of scalar ops, computed as a single fused node. Unlike `MSE_Loss`,
+    both sides get gradients, since either one can depend on the parameters.
+    """
+    if not (isinstance(a, Tensor) and isinstance(b, Tensor) and a.shape == b.shape):
+        return _affine(((a - b) ** 2).sum(), ops)  # broadcasting, or something exotic: nothing to fuse
+    diff = array('d', [p - q for p, q in zip(a._values(), b._values())])
+    return _affine(Value(sum([d * d for d in diff]))._track('squared_error', (a, b), diff), ops)
+
+def _squared_error_backprop(out):
+    a, b = out._dependents
+    a._add_grad(out._saved, 2 * out._gradient)
+    b._add_grad(out._saved, -2 * out._gradient)
+
+_BACKPROPS['squared_error'] = _squared_error_backprop
+
+def _collect(roots: List[LazyTensor]) -> dict:
+    """
+    Every node the roots need that hasn't been evaluated yet, by id.
+    """
+    nodes = {}
+    pending = list(roots)
+    while pending:
+        node = pending.pop()
+        if node.result is None and node._id not in nodes:
+            nodes[node._id] = node
+            pending.extend(arg for arg in node.args if isinstance(arg, LazyTensor))
+    return nodes
+
+def _held_elsewhere(nodes: dict) -> set:
+    """
+    Ids of the nodes that something besides the graph itself still refers to: a variable the caller holds onto, or another
+    lazy expression that isn't being evaluated yet. Anything left over once the graph's own references (the nodes dict, plus
+    each use as an input) are accounted for has to come from outside.
+    """
+    inputs = Counter(arg._id for node in nodes.values() for arg in node.args if isinstance(arg, LazyTensor))
+    return {node_id for node_id in nodes if sys.getrefcount(nodes[node_id]) > 2 + inputs[node_id]}  # + 1 for getrefcount's own argument
+
+def materialize(roots: List[LazyTensor]):
+    """
+    Evaluates any number of lazy expressions together, in four steps:
+    1. common-subexpression elimination: ops that do the same thing to the same inputs are merged, so they only run once
+    2. fusion: chains of scalar ops become one affine op; `((a - b) ** 2).sum()` becomes one fused squared-error node; and matmul + bias (or a
+       `DenseLayer`) followed by an activation becomes one fused dense node
+    3. dead-node pruning: only what the roots still need after fusion gets evaluated
+    4. evaluation, with the regular eager ops, in creation order, which builds the usual graph for backprop
+    Fused ops can round slightly differently in the last bits than the unfused ones would. Nodes that are still referenced from
+    outside the expression (say, `hidden` in `hidden = lazy(x) * W + b`) never get fused away, so their gradients are still there
+    after backprop.
+    """
+    from .layers import DenseLayer, _dense_node
+
+    nodes = _collect(roots)
+    held = _held_elsewhere(nodes)
+    order = sorted(nodes)  # creation order, so every node comes after its inputs
+
+    # 1. common-subexpression elimination
+    merged = {}  # node id -> the earlier node that computes the exact same thing
+    seen = {}
+    for node_id in order:
+        node = nodes[node_id]
+        node.args = tuple(merged.get(arg._id, arg) if isinstance(arg, LazyTensor) else arg for arg in node.args)
+        key = (node.op, tuple(_key(arg) for arg in node.args), tuple(sorted((name, _key(arg)) for name, arg in node.kwargs.items())))
+        original = seen.setdefault(key, node)
+        if original is not node:
+            merged[node_id] = original
+    live_roots = [merged.get(root._id, root) for root in roots if root.result is None]
+
+    uses = {node_id: 0 for node_id in order}
+    for root in live_roots:
+        uses[root._id] += 1
+    for node_id in order:
+        if node_id not in merged:
+            for arg in nodes[node_id].args:
+                if isinstance(arg, LazyTensor) and arg.result is None:
+                    uses[arg._id] += 1
+
+    def fusable(arg) -> bool:
+        """
+        Whether arg is a pending node whose only use is the node being fused, and that nothing outside holds onto, so it can disappear into it.
+        """
+        return isinstance(arg, LazyTensor) and arg.result is None and uses[arg._id] == 1 and arg._id not in held
+
+    def only_feeds(arg, op) -> bool:
+        return fusable(arg) and arg.op == op
+
+    def scalar_op(arg) -> bool:
+        return isinstance(arg, LazyTensor) and isinstance(arg.op, str) and arg.op in _SCALAR_OPS and isinstance(arg.args[1], (int, float))
+
+    def squared_error(node):
+        """
+        Returns (a, b) if node is ((a - b) ** 2).sum() with nothing else using the pieces, otherwise None.
+        """
+        if node.op == 'sum' and only_feeds(node.args[0], '__pow__') and node.args[0].args[1] == 2:
+            difference = node.args[0].args[0]
+            if only_feeds(difference, '__sub__') and not isinstance(difference.args[1], (int, float)):
+                return difference.args
+        return None
+
+    def dense(node):
+        """
+        Returns (x, weights, biases) if node is a `DenseLayer` call with no activation of its own, or x * weights + biases
+        for a (1 x n) bias row, otherwise None. Subclasses that override `__call__` don't count, since they do something else.
+        """
+        if isinstance(node.op, str) and node.op == '__add__' and only_feeds(node.args[0], '__mul__'):
+            (x, weights), biases = node.args[0].args, node.args[1]
+            if isinstance(weights, Tensor) and isinstance(biases, Tensor) and len(weights.shape) == 2 and biases.shape == (1, weights.shape[1]):
+                return x, weights, biases
+        if callable(node.op) and node.op.__name__ == '__call__' and isinstance(node.args[0], DenseLayer) \
+                and type(node.args[0]).__call__ is DenseLayer.__call__ and node.args[0].activation is None:
+            layer = node.args[0]
+            return node.args[1], layer.weights, layer.biases
+        return None
+
+    # 2. fusion, from the outermost op inwards, so each fusion grabs as much as it can
+    plans = {}  # node id -> (function, inputs) to evaluate instead of the node's own op
+    for node_id in reversed(order):
+        node = nodes[node_id]
+        if node_id in merged:
+            continue
+        if callable(node.op) and node.op.__name__ in _FUSABLE_ACTIVATIONS and isinstance(node.args[0], LazyTensor):
+            inner = node.args[0]
+            if fusable(inner) and dense(inner):
+                activation, alpha = _FUSABLE_ACTIVATIONS[node.op.__name__](node.args, node.kwargs)
+                plans[node_id] = (_dense_node, dense(inner) + (activation, alpha))
+        elif scalar_op(node):
+            ops = []
+            base = node
+            while base is node or (scalar_op(base) and only_feeds(base, base.op)):
+                ops.append((base.op, base.args[1]))
+                base = base.args[0]
+            ops = tuple(reversed(ops))
+            pieces = squared_error(base) if fusable(base) else None
+            if pieces:
+                plans[node_id] = (_squared_error, pieces + (ops,))
+            elif len(ops) > 1:
+                plans[node_id] = (_affine, (base, ops))
+        elif node.op == 'sum' and squared_error(node):
+            plans[node_id] = (_squared_error, squared_error(node))
+        elif dense(node) and isinstance(node.op, str):
+            plans[node_id] = (_dense_node, dense(node))
+
+    # 3. dead-node pruning
+    needed = set()
+    pending = list(live_roots)
+    while pending:
+        node = pending.pop()
+        if node.result is None and node._id not in needed:
+            needed.add(node._id)
+            inputs = plans[node._id][1] if node._id in plans else node.args
+            pending.extend(arg for arg in inputs if isinstance(arg, LazyTensor))
+
+    # 4. evaluation
+    for node_id in sorted(needed):
+        node = nodes[node_id]
+        if node_id in plans:
+            function, inputs = plans[node_id]
+            node.result = function(*[arg.result if isinstance(arg, LazyTensor) else arg for arg in inputs])
+        else:
+            node.result = _call(node.op)(*[arg.result if isinstance(arg, LazyTensor) else arg for arg in node.args], **node.kwargs)
+    for node_id, original in merged.items():
+        nodes[node_id].result = original.result
@@ -1,17 +1,136 @@
-from .value import Value
+from array import array
+from .value import Value, _BACKPROPS
 from .tensor import Tensor
+from .profiler import profiled
+from .lazy import deferrable
+import math
 
+# Every loss below is a single Value node with (predicted, target) as its parents, and a hand-written backprop that routes
+# gradients into both, since the target can depend on parameters too (and a target that doesn't just never gets used).
+
+def _differences(predicted: Tensor, target: Tensor) -> array:
+    assert predicted.shape == target.shape, "Shapes of predicted and target must match"
+    return array('d', [p - t for p, t in zip(predicted._values(), target._values())])
+
+@deferrable
+@profiled('MSE_Loss')
 def MSE_Loss(predicted: Tensor, target: Tensor) -> Value:
     """
-    Calculates a batch of predicted vs target predictions via MSE loss in the form of a tensor.
+    Calculates a batch of predicted vs target predictions via MSE loss. Each row is one sample, and the loss is averaged over
+    the whole batch. Only the differences get saved for backprop.
+    """
+    diff = _differences(predicted, target)
+    return Value(sum([d * d for d in diff]) / len(diff))._track('mse', (predicted, target), diff)
 
-    NOTE: the target Tensor will have gradients associated with it, but these are irrelevant. 
-    Since it's the predicted value, there should be no gradient associated here at all. This is a quirk of not implementing
-    gradient freezing, and having gradients always calculated.
+@deferrable
+@profiled('MAE_Loss')
+def MAE_Loss(predicted: Tensor, target: Tensor) -> Value:
     """
-    assert predicted.shape == target.shape, "Shapes of predicted and target must match"
-    
-    squared_diff = (predicted - target) * (predicted - target)  # calculate the squared difference in an autodiff-friendly manner
-    mse_loss = squared_diff.sum() / (predicted.shape[0] * predicted.shape[1])
-    
-    return mse_loss
+    Mean absolute error over every entry of every sample in the batch.
+    """
+    diff = _differences(predicted, target)
+    return Value(sum([abs(d) for d in diff]) / len(diff))._track('mae', (predicted, target), diff)
+
+def _huber(diff: array, delta: float) -> float:
+    return sum([0.5 * d * d if abs(d) <= delta else delta * (abs(d) - 0.5 * delta) for d in diff])
+
+@deferrable
+@profiled('Huber_Loss')
+def Huber_Loss(predicted: Tensor, target: Tensor, delta: float = 1.0) -> Value:
+    """
+    Squared error for differences up to delta, and absolute error past it, so outliers don't blow up the gradients. Averaged over the batch.
+    """
+    diff = _differences(predicted, target)
+    return Value(_huber(diff, delta) / len(diff))._track('huber', (predicted, target), (diff, delta))
+
+def _softmax_rows(logits: array, rows: int, cols: int) -> tuple:
+    """
+    Softmax of every row of a flat (rows x cols) buffer, plus the log-sum-exp of each row. Each row's max gets subtracted
+    before exponentiating (the log-sum-exp trick), so huge logits can't overflow.
+    """
+    probabilities = array('d')
+    log_sum_exps = []
+    for i in range(rows):
+        row = logits[i * cols:(i + 1) * cols]
+        top = max(row)
+        exps = [math.exp(z - top) for z in row]
+        total = sum(exps)
+        probabilities.extend([e / total for e in exps])
+        log_sum_exps.append(top + math.log(total))
+    return probabilities, log_sum_exps
+
+def _cross_entropy(logits: array, target: array, rows: int, cols: int) -> tuple:
+    """
+    Returns the summed cross-entropy of every row of logits against the matching row of target probabilities, plus the softmax
+    of the logits and each row's log-sum-exp (which is all backprop needs).
+    """
+    probabilities, log_sum_exps = _softmax_rows(logits, rows, cols)
+    total = 0.0
+    for i in range(rows):
+        start = i * cols
+        total += sum([t * (log_sum_exps[i] - z) for z, t in zip(logits[start:start + cols], target[start:start + cols])])  # -sum(t * log softmax(z))
+    return total, probabilities, log_sum_exps
+
+def _cross_entropy_grad(probabilities: array, target: array, rows: int, cols: int) -> list:
+    """
+    Gradient of the summed cross-entropy with respect to the logits: softmax(z) * sum(t) - t for each row (just softmax(z) - t for one-hot targets).
+    """
+    grad = []
+    for i in range(rows):
+        start = i * cols
+        row_target = target[start:start + cols]
+        mass = sum(row_target)
+        grad.extend([p * mass - t for p, t in zip(probabilities[start:start + cols], row_target)])
+    return grad
+
+def _cross_entropy_target_grad(logits: array, log_sum_exps: list, cols: int) -> list:
+    """
+    Gradient of the summed cross-entropy with respect to the target: -log softmax(z) = log-sum-exp(z) - z, for each row.
+    """
+    return [log_sum_exps[i // cols] - z for i, z in enumerate(logits)]
+
+@deferrable
+@profiled('Cross_Entropy_Loss')
+def Cross_Entropy_Loss(logits: Tensor, target: Tensor) -> Value:
+    """
+    Softmax cross-entropy between each row of raw logits and the matching row of target class probabilities (e.g. one-hot rows),
+    averaged over the batch. Computed straight from the logits with log-sum-exp, so it's stable even for very large logits.
+    """
+    assert logits.shape == target.shape, "Shapes of logits and target must match"
+    cols = logits.shape[-1]
+    rows = logits.size // cols  # the classes are along the last dim, and every other dim is just more rows
+    total, probabilities, log_sum_exps = _cross_entropy(logits._values(), target._values(), rows, cols)
+    return Value(total / rows)._track('cross_entropy', (logits, target), (probabilities, log_sum_exps))
+
+def _mse_backprop(loss):
+    predicted, target = loss._dependents
+    diff = loss._saved
+    predicted._add_grad(diff, 2 * loss.gradient / len(diff))
+    target._add_grad(diff, -2 * loss.gradient / len(diff))
+
+def _mae_backprop(loss):
+    predicted, target = loss._dependents
+    diff = loss._saved
+    signs = [(d > 0) - (d < 0) for d in diff]
+    predicted._add_grad(signs, loss.gradient / len(diff))
+    target._add_grad(signs, -loss.gradient / len(diff))
+
+def _huber_backprop(loss):
+    predicted, target = loss._dependents
+    diff, delta = loss._saved
+    clipped = [max(-delta, min(delta, d)) for d in diff]
+    predicted._add_grad(clipped, loss.gradient / len(diff))
+    target._add_grad(clipped, -loss.gradient / len(diff))
+
+def _cross_entropy_backprop(loss):
+    logits, target = loss._dependents
+    probabilities, log_sum_exps = loss._saved
+    cols = logits.shape[-1]
+    rows = logits.size // cols
+    logits._add_grad(_cross_entropy_grad(probabilities, target._values(), rows, cols), loss.gradient / rows)
+    target._add_grad(_cross_entropy_target_grad(logits._values(), log_sum_exps, cols), loss.gradient / rows)
+
+_BACKPROPS['mse'] = _mse_backprop
+_BACKPROPS['mae'] = _mae_backprop
+_BACKPROPS['huber'] = _huber_backprop
+_BACKPROPS['cross_entropy'] = _cross_entropy_backprop
@@ -1,37 +1,145 @@
 from abc import ABC, abstractmethod
-from typing import List, Callable
+from typing import List, Callable, Iterable, Iterator
 from .tensor import Tensor
+from .autograd import no_grad, zero_grad
 from .value import Value
 from .layers import Layer
+from .optim import Optimizer, SGD
+from .compile import CompiledStep
+from .checkpoint import save_weights, WeightsCheckpoint
+from .data import DataLoader, TensorDataset
+from .profiler import profiled
 import os
 import pickle
 
 class Network(ABC):
-    def __init__(self, loss_fn: Callable[[Tensor, Tensor], Value], layers: List[Layer]):
+    def __init__(self, loss_fn: Callable[[Tensor, Tensor], Value], layers: List[Layer], optimizer: Optimizer = None):
         """
-        Initializes the network with a loss function and a list of layers.
+        Initializes the network with a loss function, a list of layers, and an optimizer to update their parameters (plain SGD by default).
+        You can also swap in another optimizer later, e.g. `self.optimizer = Adam(self.parameters(), lr=0.001)`.
+        Reassigning a layer's parameters later on (`layer.weights = Tensor(...)`) is fine too: the optimizer gets pointed at the new ones before the next step.
         """
         self.loss_function = loss_fn
         self.layers = layers
         self.training_losses = []
+        self.optimizer = optimizer if optimizer is not None else SGD(self.parameters())
+        self.compiled_step = None
+        self._bound_parameters = self.parameters()  # the parameters the optimizer (and compiled step) were last pointed at
+
+    def parameters(self) -> List[Tensor]:
+        """
+        Returns every trainable parameter Tensor of every layer.
+        """
+        return [parameter for layer in self.layers for parameter in layer.parameters()]
+
+    def _rebind_parameters(self):
+        """
+        Points the optimizer and the compiled step at any parameter Tensors that replaced old ones since the last step, so training
+        updates the Tensors the layers actually hold. A parameter counts as replaced once it's no longer in any layer at all.
+        """
+        current = self.parameters()
+        ids = {id(p) for p in current}
+        replacements = {id(old): new for old, new in zip(self._bound_parameters, current) if id(old) not in ids}
+        if replacements:
+            self.optimizer.replace_parameters(replacements)
+            if self.compiled_step is not None:
+                self.compiled_step.parameters = current
+                self.compiled_step.programs = {}  # the traced programs read the old parameters, so they get retraced
+        self._bound_parameters = current
 
     def zero(self):
         """
-        Zeros out the gradients for all layers.
+        Zeros out the gradients for all layers, in O(1): it starts a new gradient generation (see `autograd.zero_grad`), which zeros
+        every gradient in the process at once. Only layers that don't expose their parameters get their own `zero()` called.
         """
+        zero_grad()
         for layer in self.layers:
-            layer.zero()
+            if not layer.parameters():
+                layer.zero()
 
-    def apply_gradients(self, learning_rate: float):
+    @profiled('apply_gradients', 'update')
+    def apply_gradients(self, learning_rate: float = None):
         """
-        Applies gradients to all layers using the specified learning rate.
+        Updates every parameter in-place by delegating to the optimizer, with the specified learning rate (or the optimizer's own if None).
+        Layers that don't expose their parameters apply their own gradients instead.
         """
+        self._rebind_parameters()
+        if learning_rate is not None:
+            self.optimizer.lr = learning_rate
+        self.optimizer.step()
+
         for layer in self.layers:
-            layer.apply_gradients(lr=learning_rate)
+            if not layer.parameters():
+                layer.apply_gradients(lr=self.optimizer.lr)
+
+    def compile(self) -> CompiledStep:
+        """
+        Compiles the forward pass + loss + backprop into a straight-line program over flat buffers, which `train_step` replays
+        from then on instead of rebuilding the computation graph every step. Traced once per input / target shape.
+        Only for networks whose forward pass does the same ops no matter what the data is (like a plain MLP).
+        """
+        self._rebind_parameters()
+        self.compiled_step = CompiledStep(self._forward_and_loss, self.parameters())
+        return self.compiled_step
+
+    def _forward_and_loss(self, inp: Tensor, target: Tensor) -> Value:
+        return self.loss_function(self.forward(inp), target)
+
+    def train_step(self, inp: Tensor, target: Tensor, learning_rate: float) -> float:
+        """
+        Runs one weight update on a whole batch (one sample per row): forward pass, loss, backprop, gradient update, and zeroing.
+        Returns the loss over the batch, which is also appended to `training_losses`.
+        """
+        self._rebind_parameters()
+        if self.compiled_step is not None:
+            loss = self.compiled_step(inp, target)
+        else:
+            loss = self._forward_and_loss(inp, target)
+            loss.backprop()
+            loss = loss.value
+        self.training_losses.append(loss)
+
+        self.apply_gradients(learning_rate)
+        self.zero()
+        return loss
+
+    def fit(self, inputs: List[List[float]], targets: List[List[float]], learning_rate: float, epochs: int = 1, batch_size: int = 32, shuffle: bool = True):
+        """
+        Mini-batch training helper. Each entry of inputs / targets is one sample (a row), and every `batch_size` samples get
+        stacked into a single (batch_size x features) Tensor, so each weight update covers the whole batch in one forward / backward pass.
+        """
+        loader = DataLoader(TensorDataset(inputs, targets), batch_size=batch_size, shuffle=shuffle)  # shuffles indices, not the data itself
+        for _ in range(epochs):
+            for inp, target in loader:
+                self.train_step(inp, target, learning_rate)
+
+    def predict(self, inputs: Iterable, chunk_size: int = 256) -> Iterator:
+        """
+        Streams predictions for any iterable of inputs (each one a number, or a list of features), without tracking gradients.
+        Inputs are grouped into chunks of chunk_size samples, and each chunk is run as a single batched forward pass.
+        Yields one plain float per input for single-output networks, otherwise one list of floats per input.
+        Only one chunk is held in memory at a time, so this works on arbitrarily long (even infinite) streams.
+        """
+        chunk = []
+        for sample in inputs:
+            chunk.append(list(sample) if isinstance(sample, (list, tuple)) else [sample])
+            if len(chunk) == chunk_size:
+                yield from self._predict_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self._predict_chunk(chunk)
+
+    def _predict_chunk(self, chunk: List[List[float]]) -> list:
+        with no_grad():
+            output = self.forward(Tensor(chunk))
+        if len(output.shape) == 1 or output.shape[1:] == (1,):  # one float per input (through _values(), in case output is a view)
+            return list(output._values())
+        return output.tolist()
 
     def save_checkpoint(self, epoch: int, checkpoint_dir: str = "checkpoints"):
         """
-        Saves the current state of the network to a .pkl file.
+        Saves the current state of the network to a .pkl file, synchronously. To checkpoint during training without waiting on
+        the disk (and without keeping every checkpoint forever), use an `AsyncCheckpointer` on `self.layers` instead.
         """
         os.makedirs(checkpoint_dir, exist_ok=True)
         checkpoint_path = os.path.join(checkpoint_dir, f"epoch_{epoch}_checkpoint.pkl")
@@ -39,6 +147,22 @@ class Network(ABC):
         with open(checkpoint_path, "wb") as f:
             pickle.dump(self, f)
 
+    def save_weights(self, path: str, dtype: str = None):
+        """
+        Saves just the weights of every layer to a compact binary file (see `/lazytorch/checkpoint.py`), instead of pickling the
+        whole network. Way smaller and faster than `save_checkpoint`, and loading it doesn't need this class to be importable.
+        Pass dtype='float32' to store the weights at half the size, whatever dtype they're trained in.
+        """
+        save_weights(self.layers, path, dtype)
+
+    def load_weights(self, path: str):
+        """
+        Loads weights saved with `save_weights` into this network's layers, in-place. The file is memory-mapped while loading.
+        """
+        with WeightsCheckpoint(path) as checkpoint:
+            checkpoint.load_into(self.layers)
+        self.optimizer.sync_master_weights()
+
     @abstractmethod
     def forward(self, inp: Tensor) -> Tensor:
         """
@@ -0,0 +1,131 @@
+from abc import ABC, abstractmethod
+from array import array
+from typing import List
+from .tensor import Tensor, _zeros
+import math
+
+class Optimizer(ABC):
+    _state = ()  # names of the per-parameter state lists (one flat buffer per parameter), for `replace_parameters`
+
+    def __init__(self, parameters: List[Tensor], lr: float):
+        """
+        Holds onto the parameter Tensors to update, plus any per-parameter state, preallocated as flat buffers the same size as each parameter.
+        float32 parameters get a float64 master copy of their weights: updates are applied to the master weights and then rounded
+        into the parameter, so updates too small to show up in float32 still add up.
+        """
+        self.parameters = list(parameters)
+        self.lr = lr
+        self.sync_master_weights()
+
+    def sync_master_weights(self):
+        """
+        Recopies the master weights from the parameters. Call this after writing new weights into the parameters yourself
+        (`Network.load_weights` already does).
+        """
+        self.master_weights = [p.data if p.data.typecode == 'd' else array('d', p.data) for p in self.parameters]  # float64 params are their own master weights
+
+    def replace_parameters(self, replacements: dict):
+        """
+        Swaps new parameter Tensors in for old ones, given {id(old): new}, like when a layer's weights get reassigned after the
+        optimizer was built (`Network` does this for you before every step). Each new parameter gets its own master weights,
+        and its per-parameter state (momentum and such) starts over from zero.
+        """
+        for i, p in enumerate(self.parameters):
+            if id(p) in replacements:
+                new = replacements[id(p)]
+                self.parameters[i] = new
+                self.master_weights[i] = new.data if new.data.typecode == 'd' else array('d', new.data)
+                for name in self._state:
+                    state = getattr(self, name)
+                    if state:
+                        state[i] = _zeros(len(new.data))
+
+    def _update(self, i: int, weights: list):
+        """
+        Writes new weights into the master weights of parameter i, and from there into the parameter itself (if it's float32).
+        """
+        master, data = self.master_weights[i], self.parameters[i].data
+        master[:] = array('d', weights)
+        if master is not data:
+            data[:] = array(data.typecode, master)
+
+    @abstractmethod
+    def step(self):
+        """
+        Must be implemented to update every parameter in-place, straight from the gradients stored in its `.grad` buffer.
+        """
+        pass
+
+    def zero(self):
+        """
+        Zeros out the gradients of every parameter.
+        """
+        for parameter in self.parameters:
+            parameter.zero()
+
+class SGD(Optimizer):
+    _state = ('velocities',)
+
+    def __init__(self, parameters: List[Tensor], lr: float = 0.01, momentum: float = 0.0):
+        """
+        Plain stochastic gradient descent, with optional momentum (a running, decaying sum of past gradients).
+        """
+        super().__init__(parameters, lr)
+        self.momentum = momentum
+        self.velocities = [_zeros(len(p.data)) for p in self.parameters] if momentum else []
+
+    def step(self):
+        lr, momentum = self.lr, self.momentum
+        if not momentum:
+            for i, (p, weights) in enumerate(zip(self.parameters, self.master_weights)):
+                self._update(i, [w - lr * g for w, g in zip(weights, p.grad)])
+            return
+
+        for i, (p, weights, velocity) in enumerate(zip(self.parameters, self.master_weights, self.velocities)):
+            velocity[:] = array('d', [momentum * v + g for v, g in zip(velocity, p.grad)])
+            self._update(i, [w - lr * v for w, v in zip(weights, velocity)])
+
+class RMSProp(Optimizer):
+    _state = ('square_averages',)
+
+    def __init__(self, parameters: List[Tensor], lr: float = 0.01, alpha: float = 0.99, eps: float = 1e-8):
+        """
+        Scales each parameter's step by a running average of its squared gradients, so noisy parameters take smaller steps.
+        """
+        super().__init__(parameters, lr)
+        self.alpha = alpha
+        self.eps = eps
+        self.square_averages = [_zeros(len(p.data)) for p in self.parameters]
+
+    def step(self):
+        lr, alpha, eps = self.lr, self.alpha, self.eps
+        for i, (p, weights, square_average) in enumerate(zip(self.parameters, self.master_weights, self.square_averages)):
+            square_average[:] = array('d', [alpha * s + (1 - alpha) * g * g for s, g in zip(square_average, p.grad)])
+            self._update(i, [w - lr * g / (math.sqrt(s) + eps) for w, g, s in zip(weights, p.grad, square_average)])
+
+class Adam(Optimizer):
+    _state = ('first_moments', 'second_moments')
+
+    def __init__(self, parameters: List[Tensor], lr: float = 0.001, beta1: float = 0.9, beta2: float = 0.999, eps: float = 1e-8):
+        """
+        Keeps running averages of each parameter's gradients (first moment) and squared gradients (second moment), corrected
+        for their bias towards zero early on, and steps along their ratio.
+        """
+        super().__init__(parameters, lr)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+        self.steps = 0
+        self.first_moments = [_zeros(len(p.data)) for p in self.parameters]
+        self.second_moments = [_zeros(len(p.data)) for p in self.parameters]
+
+    def step(self):
+        self.steps += 1
+        lr, beta1, beta2, eps = self.lr, self.beta1, self.beta2, self.eps
+        correction1 = 1 - beta1 ** self.steps
+        correction2 = 1 - beta2 ** self.steps
+
+        for i, (p, weights, first, second) in enumerate(zip(self.parameters, self.master_weights, self.first_moments, self.second_moments)):
+            first[:] = array('d', [beta1 * m + (1 - beta1) * g for m, g in zip(first, p.grad)])
+            second[:] = array('d', [beta2 * v + (1 - beta2) * g * g for v, g in zip(second, p.grad)])
+            self._update(i, [w - lr * (m / correction1) / (math.sqrt(v / correction2) + eps) for w, m, v in zip(weights, first, second)])
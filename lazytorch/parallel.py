@@ -0,0 +1,152 @@
+from array import array
+from multiprocessing import shared_memory
+from typing import List
+from .tensor import Tensor
+from .network import Network
+import multiprocessing
+import random
+
+def _worker_loop(network: Network, connection, params_name: str, grads_name: str, slot: int):
+    """
+    Runs inside each worker process: keeps its own copy of the network, and for every shard it receives, pulls the latest weights
+    out of shared memory, runs forward / backprop on the shard, and writes its (weighted) gradients into its own slot of the shared gradient buffer.
+    """
+    params_memory = shared_memory.SharedMemory(name=params_name)
+    grads_memory = shared_memory.SharedMemory(name=grads_name)
+    params = params_memory.buf.cast('d')
+    parameters = network.parameters()
+    size = sum(len(p.data) for p in parameters)
+    grads = grads_memory.buf.cast('d')[slot * size:(slot + 1) * size]
+
+    try:
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            inputs, targets, weight = message
+
+            offset = 0
+            for p in parameters:
+                if p.data.typecode == 'd':
+                    memoryview(p.data)[:] = params[offset:offset + len(p.data)]  # sync weights straight out of shared memory, no pickling
+                else:
+                    p.data[:] = array(p.data.typecode, params[offset:offset + len(p.data)])  # the shared buffer is always float64
+                offset += len(p.data)
+
+            if network.compiled_step is not None:
+                loss = network.compiled_step(Tensor(inputs), Tensor(targets))
+            else:
+                loss = network._forward_and_loss(Tensor(inputs), Tensor(targets))
+                loss.backprop()
+                loss = loss.value
+
+            offset = 0
+            for p in parameters:
+                grads[offset:offset + len(p.grad)] = array('d', [g * weight for g in p.grad])
+                offset += len(p.grad)
+            network.zero()
+            connection.send(loss * weight)
+    finally:
+        del params, grads
+        params_memory.close()
+        grads_memory.close()
+
+class DataParallelTrainer:
+    def __init__(self, network: Network, num_workers: int = None):
+        """
+        Data-parallel training for any `Network`: every batch is split into one shard per worker process, each worker runs
+        forward / backprop on its shard with its own copy of the network, and the gradients are summed through shared memory
+        before the network's own `apply_gradients` runs here in the main process.
+
+        The network is only pickled once, when the workers start. After that, weights are synced through a shared buffer
+        that every worker reads from at the start of each step.
+        """
+        self.network = network
+        self.num_workers = num_workers or multiprocessing.cpu_count()
+        self.parameters = network.parameters()
+        self.size = sum(len(p.data) for p in self.parameters)
+
+        self.params_memory = shared_memory.SharedMemory(create=True, size=8 * max(self.size, 1))
+        self.grads_memory = shared_memory.SharedMemory(create=True, size=8 * max(self.size, 1) * self.num_workers)
+        self.params = self.params_memory.buf.cast('d')
+        self.grads = self.grads_memory.buf.cast('d')
+
+        self.connections = []
+        self.workers = []
+        for slot in range(self.num_workers):
+            parent_connection, child_connection = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_worker_loop, args=(network, child_connection, self.params_memory.name, self.grads_memory.name, slot), daemon=True)
+            worker.start()
+            self.connections.append(parent_connection)
+            self.workers.append(worker)
+
+    def _publish_parameters(self):
+        """
+        Copies the network's current weights into the shared parameter buffer the workers read from. The parameters get looked up
+        again every step, in case any were reassigned (`layer.weights = Tensor(...)`) in between.
+        """
+        self.parameters = self.network.parameters()
+        assert sum(len(p.data) for p in self.parameters) == self.size, "The network's parameters can't change size while training"
+        offset = 0
+        for p in self.parameters:
+            self.params[offset:offset + len(p.data)] = p.data if p.data.typecode == 'd' else array('d', p.data)
+            offset += len(p.data)
+
+    def train_step(self, inputs: List[List[float]], targets: List[List[float]], learning_rate: float = None) -> float:
+        """
+        Runs one weight update on a batch (one sample per row), sharded across the workers. Each shard's gradients are weighted
+        by its share of the batch, so the summed gradients (and the returned loss) match a single pass over the whole batch.
+        """
+        assert len(inputs) == len(targets), "Must have exactly one target per input"
+        self._publish_parameters()
+        shard_size = -(-len(inputs) // self.num_workers)  # ceiling division
+        active = []
+        for connection, start in zip(self.connections, range(0, len(inputs), shard_size)):
+            shard_inputs, shard_targets = inputs[start:start + shard_size], targets[start:start + shard_size]
+            connection.send((shard_inputs, shard_targets, len(shard_inputs) / len(inputs)))
+            active.append(connection)
+        loss = sum(connection.recv() for connection in active)
+
+        offset = 0
+        for p in self.parameters:
+            worker_grads = [self.grads[slot * self.size + offset:slot * self.size + offset + len(p.grad)] for slot in range(len(active))]
+            p.grad[:] = array(p.grad.typecode, [sum(grads) for grads in zip(*worker_grads)])
+            offset += len(p.grad)
+
+        self.network.training_losses.append(loss)
+        self.network.apply_gradients(learning_rate)
+        self.network.zero()
+        return loss
+
+    def fit(self, inputs: List[List[float]], targets: List[List[float]], learning_rate: float = None, epochs: int = 1, batch_size: int = 256, shuffle: bool = True):
+        """
+        Mini-batch training, just like `Network.fit`, but with every batch sharded across the workers.
+        Batches should be big enough that each worker's shard is worth the round trip.
+        """
+        order = list(range(len(inputs)))
+        for _ in range(epochs):
+            if shuffle:
+                random.shuffle(order)
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                self.train_step([inputs[i] for i in batch], [targets[i] for i in batch], learning_rate)
+
+    def close(self):
+        """
+        Shuts down every worker and frees the shared memory.
+        """
+        for connection in self.connections:
+            connection.send(None)
+        for worker in self.workers:
+            worker.join()
+        del self.params, self.grads
+        self.params_memory.close()
+        self.params_memory.unlink()
+        self.grads_memory.close()
+        self.grads_memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
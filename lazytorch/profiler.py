@@ -0,0 +1,172 @@
+from bisect import bisect_right
+from typing import Callable
+from . import autograd
+from .autograd import next_node_id
+import functools
+import json
+import time
+
+_active = None  # the Profiler that's currently recording, if any; every hook checks just this one global when profiling is off
+
+class Profiler:
+    def __init__(self, max_events: int = 100000, max_scopes: int = 10000):
+        """
+        Records where a training step spends its time: wall time, graph nodes created, and backward closures run, per layer
+        (or activation / loss / optimizer) and per phase (forward, backward, update). Switch it on and off at runtime:
+
+            profiler = Profiler()
+            with profiler:
+                network.train_step(x, y, lr)
+            print(profiler.report())
+            profiler.export_chrome_trace("trace.json")  # open in chrome://tracing or https://ui.perfetto.dev
+
+        Nodes are attributed to whichever layer created them by their creation stamps, so the forward pass pays nothing per node.
+        Only the first max_events individual events are kept for the trace; the aggregated stats keep counting after that.
+        Forward scopes are only kept until the next backward pass needs them, and at most max_scopes of them (the oldest half
+        gets dropped past that, so forward passes that never get backpropped can't pile up; their nodes just count as 'other').
+        """
+        self.max_events = max_events
+        self.max_scopes = max_scopes
+        self.events = []  # (name, phase, start seconds, duration seconds, nodes created, backward closures run)
+        self.stats = {}  # (name, phase) -> [calls, total seconds, nodes created, backward closures run]
+        self.scopes = []  # (first node id, last node id, name) of each forward scope, in the order they were opened
+        self.scope_starts = []
+        self.layer_names = {}
+        self.start_time = time.perf_counter()
+        self._backward_time = {}
+        self._backward_count = {}
+
+    def enable(self):
+        global _active
+        _active = self
+        autograd._profiler = self
+
+    def disable(self):
+        global _active
+        if _active is self:
+            _active = None
+            autograd._profiler = None
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.disable()
+
+    def reset(self):
+        self.__init__(self.max_events, self.max_scopes)
+
+    def name_of(self, layer) -> str:
+        """
+        Gives each layer instance a stable, readable name, like `DenseLayer[1]`, numbered per class in order of first use.
+        """
+        if id(layer) not in self.layer_names:
+            kind = type(layer).__name__
+            count = sum(1 for name in self.layer_names.values() if name.startswith(kind + '['))
+            self.layer_names[id(layer)] = f"{kind}[{count}]"
+        return self.layer_names[id(layer)]
+
+    def _record(self, name: str, phase: str, start: float, duration: float, nodes: int = 0, closures: int = 0):
+        if len(self.events) < self.max_events:
+            self.events.append((name, phase, start, duration, nodes, closures))
+        stat = self.stats.setdefault((name, phase), [0, 0.0, 0, 0])
+        stat[0] += 1
+        stat[1] += duration
+        stat[2] += nodes
+        stat[3] += closures
+
+    def _call(self, name: str, phase: str, fn: Callable, args: tuple, kwargs: dict):
+        first_id = next_node_id()
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            last_id = next_node_id()
+            self._record(name, phase, start, duration, last_id - first_id - 1)
+            if phase == 'forward' and autograd.is_grad_enabled():  # nothing built under no_grad gets backpropped, so it never needs an owner
+                # inner scopes close first, so keep them sorted by where they opened (which is almost always at the end)
+                i = bisect_right(self.scope_starts, first_id)
+                self.scope_starts.insert(i, first_id)
+                self.scopes.insert(i, (first_id, last_id, name))
+                if len(self.scopes) > self.max_scopes:
+                    del self.scopes[:len(self.scopes) // 2], self.scope_starts[:len(self.scope_starts) // 2]
+
+    def _owner(self, node_id: int) -> str:
+        """
+        Finds the innermost forward scope whose creation stamps cover this node, i.e. the layer that created it.
+        """
+        i = bisect_right(self.scope_starts, node_id) - 1
+        while i >= 0:
+            first_id, last_id, name = self.scopes[i]
+            if first_id < node_id < last_id:
+                return name
+            i -= 1
+        return 'other'
+
+    def _profiled_backprop(self, node):
+        """
+        Stands in for `node._backprop()` inside the backprop engine while profiling, timing it and charging it to its layer.
+        """
+        start = time.perf_counter()
+        node._backprop()
+        duration = time.perf_counter() - start
+        owner = self._owner(node._id)
+        self._backward_time[owner] = self._backward_time.get(owner, 0.0) + duration
+        self._backward_count[owner] = self._backward_count.get(owner, 0) + 1
+
+    def _begin_backward(self):
+        self._backward_time.clear()
+        self._backward_count.clear()
+        return time.perf_counter()
+
+    def _end_backward(self, start: float):
+        duration = time.perf_counter() - start
+        offset = start  # per-layer times are summed over the whole walk, so in the trace they're laid out one after another inside it
+        for owner, seconds in self._backward_time.items():
+            self._record(owner, 'backward', offset, seconds, closures=self._backward_count[owner])
+            offset += seconds
+        self._record('backprop', 'backward', start, duration, closures=sum(self._backward_count.values()))
+        self.scopes.clear()  # this step's graph has been walked, so its forward scopes don't need to be looked up anymore
+        self.scope_starts.clear()
+
+    def report(self, sort_by: str = 'total') -> str:
+        """
+        Returns a table of every (name, phase) pair with its call count, total and mean wall time, nodes created, and backward
+        closures run, sorted by total time (or by 'nodes' / 'closures'). The `backprop` row is the whole backward walk,
+        engine overhead included, while the per-layer backward rows only count the time spent inside their closures.
+        """
+        column = {'total': 1, 'nodes': 2, 'closures': 3}[sort_by]
+        rows = sorted(self.stats.items(), key=lambda item: -item[1][column])
+        lines = [f"{'name':<24}{'phase':<10}{'calls':>8}{'total ms':>12}{'mean ms':>10}{'nodes':>10}{'closures':>10}"]
+        for (name, phase), (calls, total, nodes, closures) in rows:
+            lines.append(f"{name:<24}{phase:<10}{calls:>8}{total * 1000:>12.3f}{total * 1000 / calls:>10.3f}{nodes:>10}{closures:>10}")
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path: str):
+        """
+        Writes every recorded event in the Chrome trace event format (a JSON list of complete events, times in microseconds),
+        one track per phase.
+        """
+        tracks = {'forward': 0, 'backward': 1, 'update': 2}
+        trace = [{'name': name, 'cat': phase, 'ph': 'X', 'pid': 0, 'tid': tracks.get(phase, 3),
+                  'ts': (start - self.start_time) * 1e6, 'dur': duration * 1e6,
+                  'args': {'nodes': nodes, 'closures': closures}}
+                 for name, phase, start, duration, nodes, closures in self.events]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace}, f)
+
+def profiled(name: str = None, phase: str = 'forward'):
+    """
+    Decorator that times a function (or method) whenever a Profiler is on, and just calls straight through otherwise.
+    With no name, it's named after the instance it's called on (e.g. `DenseLayer[0]`), so leave it off for layer methods only.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return fn(*args, **kwargs)
+            return _active._call(name or _active.name_of(args[0]), phase, fn, args, kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,179 @@
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+from .network import Network
+from .data import DataLoader, SharedDataset
+import itertools
+import math
+import multiprocessing
+import os
+import queue
+import random
+
+def grid_search(space: Dict[str, Sequence]) -> List[dict]:
+    """
+    Every combination of the given values, e.g. `grid_search({'learning_rate': [0.01, 0.001], 'hidden_size': [16, 32]})` gives 4 configs.
+    """
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*[space[name] for name in names])]
+
+def log_uniform(low: float, high: float) -> Callable[[random.Random], float]:
+    """
+    For `random_search`: samples between low and high evenly in log space, which is usually what you want for learning rates.
+    """
+    return lambda rng: math.exp(rng.uniform(math.log(low), math.log(high)))
+
+def random_search(space: Dict[str, Any], num_samples: int, seed: int = None) -> List[dict]:
+    """
+    num_samples random configs. Each entry of the space can be a list of choices, a (low, high) tuple to sample uniformly from,
+    or a function that takes a `random.Random` and returns a sample (like `log_uniform(1e-4, 1e-1)`).
+    """
+    rng = random.Random(seed)
+
+    def sample(choices):
+        if callable(choices):
+            return choices(rng)
+        if isinstance(choices, tuple):
+            low, high = choices
+            return rng.randint(low, high) if isinstance(low, int) and isinstance(high, int) else rng.uniform(low, high)
+        return rng.choice(choices)
+    return [{name: sample(choices) for name, choices in space.items()} for _ in range(num_samples)]
+
+def ensemble(config: dict, num_members: int) -> List[dict]:
+    """
+    The same config num_members times, each with its own seed, for training the members of an ensemble side by side.
+    """
+    return [dict(config, seed=seed) for seed in range(num_members)]
+
+class SweepResult:
+    def __init__(self, index: int, config: dict, losses: List[float], epoch_losses: List[float], weights: List[array], checkpoint: str = None):
+        """
+        One finished training run: its config (and position in the sweep), the loss of every step, the mean loss of every epoch,
+        and the final weights of every parameter (plus the binary weights checkpoint they were saved to, if any).
+        """
+        self.index = index
+        self.config = config
+        self.losses = losses
+        self.epoch_losses = epoch_losses
+        self.weights = weights
+        self.checkpoint = checkpoint
+
+    @property
+    def final_loss(self) -> float:
+        return self.epoch_losses[-1] if self.epoch_losses else float('nan')
+
+    def load_into(self, network: Network):
+        """
+        Copies this run's final weights into a network with the same architecture, in-place.
+        """
+        parameters = network.parameters()
+        assert len(parameters) == len(self.weights), "Network has a different number of parameters than this run"
+        for parameter, weights in zip(parameters, self.weights):
+            assert len(parameter.data) == len(weights), "Network has different parameter shapes than this run"
+            parameter.data[:] = weights if weights.typecode == parameter.data.typecode else array(parameter.data.typecode, weights)
+        network.optimizer.sync_master_weights()
+
+    def __repr__(self):
+        return f"SweepResult({self.index}, {self.config!r}, final_loss={self.final_loss})"
+
+_worker_state = {}  # the shared dataset, network factory, and default settings of each worker process, set once when the pool starts
+
+def _init_worker(dataset: SharedDataset, network_factory, settings: dict, events, workers=None):
+    _worker_state.update(dataset=dataset, network_factory=network_factory, settings=settings, events=events, workers=workers)
+
+def _run(index: int, config: dict, report: Callable) -> SweepResult:
+    """
+    Trains one config from scratch, calling report(epoch, mean loss) after every epoch. The global `random` state gets seeded
+    for the run (so weight init and shuffling are reproducible per run, and different across runs) and put back afterwards,
+    since inline sweeps run in the caller's own process.
+    """
+    state = random.getstate()
+    random.seed(config.get('seed', index))
+    try:
+        return _train_run(index, config, report)
+    finally:
+        random.setstate(state)
+
+def _train_run(index: int, config: dict, report: Callable) -> SweepResult:
+    settings = dict(_worker_state['settings'], **{name: config[name] for name in ('learning_rate', 'epochs', 'batch_size') if name in config})
+    network = _worker_state['network_factory'](config)
+    if settings['compile']:
+        network.compile()
+
+    loader = DataLoader(_worker_state['dataset'], batch_size=settings['batch_size'], shuffle=True)
+    losses, epoch_losses = [], []
+    for epoch in range(settings['epochs']):
+        start = len(losses)
+        for inp, target in loader:
+            losses.append(network.train_step(inp, target, settings['learning_rate']))
+        epoch_losses.append(sum(losses[start:]) / max(len(losses) - start, 1))
+        report(epoch, epoch_losses[-1])
+
+    checkpoint = None
+    if settings['checkpoint_dir'] is not None:
+        checkpoint = os.path.join(settings['checkpoint_dir'], f"sweep_{index}.lzt")
+        network.save_weights(checkpoint)
+    return SweepResult(index, config, losses, epoch_losses, [array(p.data.typecode, p.data) for p in network.parameters()], checkpoint)
+
+def _train(task: tuple):
+    index, config = task
+    events = _worker_state['events']
+    _worker_state['workers'][index] = os.getpid()  # straight into shared memory, so it's there even if this process dies right away
+    try:
+        events.put(('done', index, _run(index, config, lambda epoch, loss: events.put(('epoch', index, epoch, loss)))))
+    except Exception as error:
+        events.put(('error', index, RuntimeError(f"Run {index} ({config!r}) failed: {error!r}")))  # the original might not be picklable
+
+def sweep(network_factory: Callable[[dict], Network], configs: List[dict], inputs: Sequence, targets: Sequence, epochs: int = 1,
+          batch_size: int = 32, learning_rate: float = None, compile: bool = False, checkpoint_dir: str = None, processes: int = None,
+          on_epoch: Callable[[int, dict, int, float], None] = None) -> Iterator[SweepResult]:
+    """
+    Trains one network per config, in parallel over a pool of processes (one per core by default), and yields a `SweepResult`
+    for each run as soon as it finishes (so not necessarily in config order; each result knows its index).
+
+    network_factory(config) builds a fresh, untrained network for a config, and has to be picklable if the pool spawns its
+    processes (e.g. a module-level function). Each config can override learning_rate, epochs, and batch_size, and can set a
+    seed (its index by default); everything else in it is up to the factory. Build configs with `grid_search`, `random_search`,
+    or `ensemble`. The training data is copied once into shared memory that every worker reads from (see `SharedDataset`),
+    instead of being copied into each one. on_epoch(index, config, epoch, mean loss) gets called in this process after every
+    epoch of every run, as the workers report them, and with a checkpoint_dir, every run's final weights also get saved there.
+    """
+    if checkpoint_dir is not None:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+    settings = {'epochs': epochs, 'batch_size': batch_size, 'learning_rate': learning_rate, 'compile': compile, 'checkpoint_dir': checkpoint_dir}
+    dataset = SharedDataset(inputs, targets)
+    try:
+        if processes == 1 or len(configs) <= 1:
+            _init_worker(dataset, network_factory, settings, None)
+            for index, config in enumerate(configs):
+                report = (lambda epoch, loss: on_epoch(index, config, epoch, loss)) if on_epoch else (lambda epoch, loss: None)
+                yield _run(index, config, report)
+            return
+
+        events = multiprocessing.Queue()
+        workers = multiprocessing.RawArray('q', len(configs))  # the pid of the worker running each config, once one picks it up
+        with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(dataset, network_factory, settings, events, workers)) as pool:
+            # runs that never make it to a worker (e.g. a config that can't be pickled) fail the whole map, and report it here
+            pool.map_async(_train, list(enumerate(configs)), chunksize=1,
+                           error_callback=lambda error: events.put(('error', None, RuntimeError(f"Sweep failed: {error!r}"))))
+            running = set(range(len(configs)))
+            while running:
+                try:
+                    kind, index, *payload = events.get(timeout=1)
+                except queue.Empty:
+                    # the pool replaces a worker that dies, but the run it had is just lost, so check on them every so often
+                    alive = {process.pid for process in multiprocessing.active_children()}
+                    for index in running:
+                        if workers[index] and workers[index] not in alive:
+                            raise RuntimeError(f"Run {index} ({configs[index]!r}) failed: its worker process died")
+                    continue
+                if kind == 'epoch':
+                    if on_epoch:
+                        on_epoch(index, configs[index], *payload)
+                elif kind == 'error':
+                    raise payload[0]
+                else:
+                    running.discard(index)
+                    yield payload[0]
+    finally:
+        _worker_state.clear()
+        dataset.close()
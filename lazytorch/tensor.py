@@ -1,99 +1,646 @@
-from .value import Value
+from array import array
+from .value import Value, _BACKPROPS as _VALUE_BACKPROPS
+from . import autograd
+from .autograd import _released_backprop, next_node_id, backprop, is_grad_enabled
+
+# dtype name -> array typecode of the buffers. Either way, all the math happens on Python floats (float64), so sums, dot products,
+# and gradient accumulation are done in full precision, and float32 results only get rounded once, when they're stored.
+_DTYPES = {'float64': 'd', 'float32': 'f'}
+_default_typecode = 'd'
+
+def set_default_dtype(dtype: str):
+    """
+    Sets the dtype ('float64' or 'float32') of every Tensor created from a nested list from now on, like the weights of new layers.
+    float32 buffers take half the memory (and half the checkpoint space); ops on them produce float32 outputs too.
+    """
+    global _default_typecode
+    if dtype not in _DTYPES:
+        raise Exception(f"Unknown dtype '{dtype}', must be one of {list(_DTYPES)}")
+    _default_typecode = _DTYPES[dtype]
+
+def get_default_dtype() -> str:
+    return 'float32' if _default_typecode == 'f' else 'float64'
+
+def _typecode(*tensors) -> str:
+    """
+    Storage typecode of an op's output: float32 only if every input Tensor is float32.
+    """
+    return 'f' if all(tensor.data.typecode == 'f' for tensor in tensors) else 'd'
+
+def _zeros(size: int, typecode: str = 'd') -> array:
+    """
+    Allocates a flat array buffer of the given size and typecode, filled with zeros.
+    """
+    return array(typecode, bytes(array(typecode).itemsize * size))
+
+def _matmul(a: array, b: array, m: int, k: int, n: int) -> array:
+    """
+    Matrix multiplies two flat row-major buffers, (m x k) * (k x n), into a new flat (m x n) buffer.
+    """
+    columns = [b[j::n] for j in range(n)]  # pull each column of b out once so the inner loop is a plain dot product
+    return _matmul_columns(a, m, k, columns)
+
+def _matmul_nt(a: array, b: array, m: int, k: int, n: int) -> array:
+    """
+    Computes a * b^T for flat row-major buffers a (m x k) and b (n x k), into a new flat (m x n) buffer, without transposing b.
+    """
+    rows = [b[j * k:(j + 1) * k] for j in range(n)]  # the rows of b are exactly the columns of b^T
+    return _matmul_columns(a, m, k, rows)
+
+def _matmul_columns(a: array, m: int, k: int, columns: list) -> array:
+    """
+    Dots every row of the flat (m x k) buffer a with every one of the given length-k columns.
+    """
+    out = array('d')
+    for i in range(m):
+        row = a[i * k:(i + 1) * k]
+        out.extend([sum([x * y for x, y in zip(row, column)]) for column in columns])
+    return out
+
+def _matmul_tn(a: array, b: array, m: int, k: int, n: int) -> array:
+    """
+    Computes a^T * b for flat row-major buffers a (m x k) and b (m x n), into a new flat (k x n) buffer, as a sum of
+    outer products of the rows of a and b (cheap when m, usually the batch size, is small).
+    """
+    out = [0.0] * (k * n)
+    for i in range(m):
+        row_a = a[i * k:(i + 1) * k]
+        row_b = b[i * n:(i + 1) * n]
+        for p, x in enumerate(row_a):
+            if x != 0:
+                start = p * n
+                out[start:start + n] = [o + x * y for o, y in zip(out[start:start + n], row_b)]
+    return array('d', out)
+
+def _accumulate(grad: array, delta, scale: float = 1.0):
+    """
+    Adds (scale * delta) into a gradient buffer in-place, in one pass over the whole buffer.
+    """
+    if scale == 1.0:
+        grad[:] = array(grad.typecode, [g + d for g, d in zip(grad, delta)])
+    else:
+        grad[:] = array(grad.typecode, [g + scale * d for g, d in zip(grad, delta)])
+
+def _size(shape: tuple) -> int:
+    size = 1
+    for dim in shape:
+        size *= dim
+    return size
+
+def _row_major_strides(shape: tuple) -> tuple:
+    """
+    Strides of a contiguous buffer of the given shape: the last dim moves by 1, each dim before it by the size of everything after it.
+    """
+    strides = []
+    step = 1
+    for dim in reversed(shape):
+        strides.append(step)
+        step *= dim
+    return tuple(reversed(strides))
+
+def _strided_indices(shape: tuple, strides: tuple, offset: int = 0) -> list:
+    """
+    Lists the buffer index of every entry of a strided layout, in row-major order.
+    """
+    indices = [offset]
+    for dim, stride in zip(shape, strides):
+        indices = [i + j * stride for i in indices for j in range(dim)]
+    return indices
+
+def _broadcast_shape(a: tuple, b: tuple) -> tuple:
+    """
+    Returns the output shape of an element-wise op between two shapes, numpy style: shapes are lined up from the last dim,
+    and every pair of dims must either match or have one of them be 1 (or missing), which then gets repeated to match the other.
+    E.g. adding a (1 x n) bias to a whole (batch x n) batch, or a (n) vector to a (batch x seq x n) Tensor.
+    """
+    if a == b:
+        return a
+    ndim = max(len(a), len(b))
+    a, b = (1,) * (ndim - len(a)) + a, (1,) * (ndim - len(b)) + b
+    assert all(x == y or x == 1 or y == 1 for x, y in zip(a, b)), f"Shapes {a} and {b} can't be broadcast together"
+    return tuple(max(x, y) for x, y in zip(a, b))
+
+def _broadcast_indices(shape: tuple, out_shape: tuple) -> list:
+    """
+    For every entry of out_shape (in row-major order), the index of the entry of a contiguous `shape` buffer that gets broadcast into it.
+    """
+    padded = (1,) * (len(out_shape) - len(shape)) + shape
+    strides = [0 if dim == 1 else stride for dim, stride in zip(padded, _row_major_strides(padded))]  # repeated dims don't move
+    return _strided_indices(out_shape, strides)
+
+def _is_row(shape: tuple, out_shape: tuple) -> bool:
+    return len(shape) == len(out_shape) == 2 and shape[0] == 1 and shape[1] == out_shape[1]
+
+def _expand(data: array, shape: tuple, out_shape: tuple) -> array:
+    """
+    Broadcasts a flat buffer of the given shape up to out_shape (no-op if they already match).
+    """
+    if shape == out_shape:
+        return data
+    if _is_row(shape, out_shape):
+        return data * out_shape[0]  # the common case, a single row repeated down every row
+    return array('d', [data[i] for i in _broadcast_indices(shape, out_shape)])
+
+def _reduce(grad: array, shape: tuple, target_shape: tuple):
+    """
+    Sums a flat gradient buffer of the given shape back down to target_shape, undoing `_expand` for backprop.
+    """
+    if shape == target_shape:
+        return grad
+    if _is_row(target_shape, shape):
+        cols = shape[1]
+        return [sum(grad[j::cols]) for j in range(cols)]
+    out = [0.0] * _size(target_shape)
+    for g, i in zip(grad, _broadcast_indices(target_shape, shape)):
+        out[i] += g
+    return out
+
+def _nested(data, shape: tuple) -> list:
+    if len(shape) == 1:
+        return list(data)
+    step = len(data) // shape[0]
+    return [_nested(data[i:i + step], shape[1:]) for i in range(0, len(data), step)]
 
 class Tensor:
-    def __init__(self, data):
-        self.data = [[Value(x) if not isinstance(x, Value) else x for x in row] for row in data]
-        self.shape = (len(data), len(data[0]))
-    
+    _dependents = ()  # leaves (and anything computed under no_grad) share these class-level defaults instead of allocating their own
+    _op = ''
+    _saved = None
+    offset = 0
+    _contiguous = True  # False for views whose entries aren't one unbroken row-major run of the buffer
+    _grad = None  # the gradient buffer only gets allocated once something actually writes or reads a gradient
+    _grad_generation = -1  # the gradient generation `_grad` was written in (see `autograd.zero_grad`); older ones count as zero
+    _grad_owner = None  # for views, the Tensor whose gradient buffer they share
+
+    def __init__(self, data, dtype: str = None):
+        """
+        Builds an N-D Tensor from a nested list (of any depth) of floats or ints. Everything is stored in one flat, row-major
+        array buffer (plus a matching gradient buffer) with a shape and strides, instead of one `Value` object per entry.
+        The buffers are float64 unless dtype (or the default dtype, see `set_default_dtype`) is 'float32'.
+        `Value`s aren't allowed, since a Tensor entry can't pass gradients back to one: build from `value.value` instead, and
+        the Tensor is a leaf of its own.
+        """
+        if dtype is not None and dtype not in _DTYPES:
+            raise Exception(f"Unknown dtype '{dtype}', must be one of {list(_DTYPES)}")
+        if not isinstance(data, (list, tuple)):
+            raise Exception("Tensor data must be a (nested) list of numbers")
+        shape = []
+        level = data
+        while isinstance(level, (list, tuple)):
+            shape.append(len(level))
+            level = level[0]
+        flat = data
+        for dim in shape[1:]:
+            assert all(len(row) == dim for row in flat), "Every row of a Tensor must have the same length"
+            flat = [x for row in flat for x in row]
+        if any(isinstance(x, Value) for x in flat):
+            raise TypeError("Tensor entries must be numbers, not Values (use value.value for a copy that doesn't track gradients)")
+        self.data = array(_DTYPES[dtype] if dtype else _default_typecode, flat)
+        self.shape = tuple(shape)
+        self.strides = _row_major_strides(self.shape)
+        self._id = next_node_id()
+
+    @classmethod
+    def _from_buffer(cls, data: array, shape: tuple):
+        """
+        Wraps an existing flat buffer as a Tensor without copying it. Used internally by every op to build its output.
+        """
+        out = cls.__new__(cls)
+        out.data = data
+        out.shape = shape
+        out.strides = _row_major_strides(shape)
+        out._id = next_node_id()
+        return out
+
+    def _track(self, op: str, parents: tuple, saved=None):
+        """
+        Records this freshly computed Tensor as the output of an op on the given parents, unless graph building is turned off.
+        """
+        if is_grad_enabled():
+            self._op = op
+            self._dependents = parents
+            self._saved = saved
+        return self
+
+    def _backprop(self):
+        """
+        Passes this Tensor's gradients back to its parents, using the backprop function registered for its op (leaves have none).
+        """
+        if self._op:
+            _BACKPROPS[self._op](self)
+
+    def __setstate__(self, state):
+        """
+        Gives unpickled nodes a fresh creation stamp, so they still count as older than anything computed from them in this process.
+        Since ops are stored as tags instead of closures, the whole graph (backprop included) survives pickling.
+        """
+        self.__dict__.update(state)
+        self._id = next_node_id()
+        if self._grad is not None:
+            self._grad_generation = autograd._generation  # generations are per process, so whatever gradients it was pickled with are current here
+
+    @property
+    def grad(self) -> array:
+        """
+        The flat gradient buffer (shared with the original, for views). If it was written before the last `zero_grad()` (e.g. from
+        `Network.zero()`), it gets zeroed right here, the first time anything touches it in the new generation.
+        """
+        owner = self if self._grad_owner is None else self._grad_owner
+        if owner._grad_generation != autograd._generation:
+            if owner._grad is None:
+                owner._grad = _zeros(len(owner.data), owner.data.typecode)
+            else:
+                owner._grad[:] = _zeros(len(owner._grad), owner._grad.typecode)
+            owner._grad_generation = autograd._generation
+        return owner._grad
+
+    @property
+    def _generation(self) -> int:
+        return autograd._generation  # Tensors check their gradient's generation themselves (in `grad`), so the engine never has to
+
+    @property
+    def size(self) -> int:
+        return _size(self.shape)
+
+    @property
+    def dtype(self) -> str:
+        return 'float32' if self.data.typecode == 'f' else 'float64'
+
+    def to(self, dtype: str):
+        """
+        Returns a copy of this Tensor stored as the given dtype ('float64' or 'float32'), which still routes gradients back to it.
+        Returns this Tensor itself if it's already stored that way.
+        """
+        if dtype not in _DTYPES:
+            raise Exception(f"Unknown dtype '{dtype}', must be one of {list(_DTYPES)}")
+        if dtype == self.dtype:
+            return self
+        return Tensor._from_buffer(array(_DTYPES[dtype], self._values()), self.shape)._track('cast', (self,))
+
+    # ---- views: Tensors that share another Tensor's data and grad buffers, with their own shape, strides, and offset ----
+
+    def _view(self, shape: tuple, strides: tuple, offset: int):
+        """
+        Returns a view of the same buffers, without copying anything. Since the view shares the gradient buffer too, every op
+        that uses the view adds its gradients straight into the right entries of the original; the view node itself only
+        keeps the original in the graph, so backprop still reaches it (and everything before it) afterwards.
+        """
+        out = Tensor.__new__(Tensor)
+        out.data = self.data
+        out._grad_owner = self if self._grad_owner is None else self._grad_owner
+        out.shape = tuple(shape)
+        out.strides = tuple(strides)
+        out.offset = offset
+        out._contiguous = out.strides == _row_major_strides(out.shape)
+        out._id = next_node_id()
+        return out._track('view', (self,))
+
+    def _is_whole_buffer(self) -> bool:
+        return self._contiguous and self.offset == 0 and len(self.data) == self.size
+
+    def _indices(self) -> list:
+        return _strided_indices(self.shape, self.strides, self.offset)
+
+    def _gather(self, buffer: array) -> array:
+        if self._is_whole_buffer():
+            return buffer
+        if self._contiguous:
+            return buffer[self.offset:self.offset + self.size]
+        return array(buffer.typecode, [buffer[i] for i in self._indices()])
+
+    def _values(self) -> array:
+        """
+        This Tensor's values as one contiguous row-major buffer, which is what every op's kernel works on. Free for regular
+        Tensors (it's just `.data`); views that aren't contiguous get gathered into a new buffer.
+        """
+        return self._gather(self.data)
+
+    def _add_grad(self, delta, scale: float = 1.0):
+        """
+        Adds (scale * delta), given in row-major order, into this Tensor's entries of the gradient buffer. For views, that's
+        the original's gradient buffer, so broadcast (stride 0) entries correctly add up all their contributions.
+        """
+        if self._grad_owner is None and self._grad_generation != autograd._generation and self._is_whole_buffer():
+            # the first gradient this generation: nothing to add it to, so just write it (no zeroing pass needed)
+            if self._grad is None:
+                self._grad = array(self.data.typecode, delta if scale == 1.0 else [scale * d for d in delta])
+            else:
+                self._grad[:] = array(self._grad.typecode, delta if scale == 1.0 else [scale * d for d in delta])
+            self._grad_generation = autograd._generation
+        elif self._is_whole_buffer():
+            _accumulate(self.grad, delta, scale)
+        elif self._contiguous:
+            start, end = self.offset, self.offset + self.size
+            self.grad[start:end] = array(self.grad.typecode, [g + scale * d for g, d in zip(self.grad[start:end], delta)])
+        else:
+            grad = self.grad
+            for i, d in zip(self._indices(), delta):
+                grad[i] += scale * d
+
+    def _set_grad(self, values):
+        if self._is_whole_buffer():
+            self.grad[:] = array(self.grad.typecode, values)
+        else:
+            for i, value in zip(self._indices(), values):
+                self.grad[i] = value
+
+    def _dim(self, dim: int) -> int:
+        assert -len(self.shape) <= dim < len(self.shape), f"Dim {dim} is out of range for a {len(self.shape)}D Tensor"
+        return dim % len(self.shape)
+
+    def transpose(self, dim0: int = -2, dim1: int = -1):
+        """
+        Swaps two dims (the last two by default), as a view: nothing is copied, only the strides are swapped.
+        """
+        dim0, dim1 = self._dim(dim0), self._dim(dim1)
+        shape, strides = list(self.shape), list(self.strides)
+        shape[dim0], shape[dim1] = shape[dim1], shape[dim0]
+        strides[dim0], strides[dim1] = strides[dim1], strides[dim0]
+        return self._view(shape, strides, self.offset)
+
+    @property
+    def T(self):
+        """
+        Reverses every dim (a plain transpose for 2D Tensors), as a view.
+        """
+        return self._view(self.shape[::-1], self.strides[::-1], self.offset)
+
+    def reshape(self, *shape):
+        """
+        Returns the same entries (in row-major order) with a new shape; one dim can be -1 to fill in whatever's left. A view if
+        this Tensor is contiguous, otherwise it's made contiguous first (that copy is the only case where reshape copies).
+        """
+        if len(shape) == 1 and isinstance(shape[0], (list, tuple)):
+            shape = tuple(shape[0])
+        if -1 in shape:
+            known = _size([dim for dim in shape if dim != -1])
+            shape = tuple(self.size // known if dim == -1 else dim for dim in shape)
+        assert _size(shape) == self.size, f"Can't reshape a Tensor of shape {self.shape} into {shape}"
+        source = self if self._contiguous else self.contiguous()
+        return source._view(shape, _row_major_strides(shape), source.offset)
+
+    def expand(self, *shape):
+        """
+        Broadcasts this Tensor up to a bigger shape as a view, by giving every repeated dim a stride of 0 (numpy broadcasting rules).
+        """
+        if len(shape) == 1 and isinstance(shape[0], (list, tuple)):
+            shape = tuple(shape[0])
+        assert _broadcast_shape(self.shape, shape) == shape, f"Can't expand a Tensor of shape {self.shape} to {shape}"
+        padded = (1,) * (len(shape) - len(self.shape)) + self.shape
+        strides = (0,) * (len(shape) - len(self.shape)) + self.strides
+        return self._view(shape, [0 if dim == 1 and out != 1 else stride for dim, out, stride in zip(padded, shape, strides)], self.offset)
+
+    def __getitem__(self, key):
+        """
+        Indexes and slices like a nested list (or numpy), returning a view: `x[0]`, `x[1:3]`, `x[:, 2]`, `x[::2, 1:]`, and so on.
+        Every integer index drops a dim.
+        """
+        if not isinstance(key, tuple):
+            key = (key,)
+        assert len(key) <= len(self.shape), "Too many indices for this Tensor"
+        shape, strides, offset = [], [], self.offset
+        for dim, (size, stride) in enumerate(zip(self.shape, self.strides)):
+            if dim >= len(key):
+                shape.append(size)
+                strides.append(stride)
+            elif isinstance(key[dim], slice):
+                start, stop, step = key[dim].indices(size)
+                offset += start * stride
+                shape.append(len(range(start, stop, step)))
+                strides.append(stride * step)
+            elif isinstance(key[dim], int):
+                index = key[dim] + size if key[dim] < 0 else key[dim]
+                if not 0 <= index < size:
+                    raise IndexError(f"Index {key[dim]} is out of range for dim {dim} of size {size}")
+                offset += index * stride
+            else:
+                raise Exception("Tensors can only be indexed with ints and slices")
+        return self._view(shape, strides, offset)
+
+    def contiguous(self):
+        """
+        Returns this Tensor if it's already contiguous, otherwise a contiguous copy of it (which still routes gradients back).
+        """
+        if self._contiguous:
+            return self
+        return Tensor._from_buffer(self._values(), self.shape)._track('contiguous', (self,))
+
     def __str__(self):
-        return '\n'.join(['\t'.join([str(x) for x in row]) for row in self.data])
+        if len(self.shape) == 0:
+            return str(self.item())
+        if len(self.shape) > 2:
+            return str(self.tolist())
+        values = self._values()
+        cols = self.shape[-1]
+        return '\n'.join(['\t'.join([str(x) for x in values[i:i + cols]]) for i in range(0, len(values), cols)])
+
+    def tolist(self):
+        """
+        Returns the values of this Tensor as a nested list of plain floats.
+        """
+        if len(self.shape) == 0:
+            return self.item()
+        return _nested(self._values(), self.shape)
+
+    def item(self) -> float:
+        """
+        Returns the only value of a single-entry Tensor, like `Tensor([[0]])`, as a plain float.
+        """
+        assert self.size == 1, "item() only works on Tensors with exactly one value"
+        return self.data[self._indices()[0]]
 
     def __add__(self, other):
         """
         If you pass in a Tensor, it adds the tensors together. If you pass in a scalar, it performs element wise addition of the scalar.
+        Tensors of different shapes get broadcast against each other (numpy rules), so you can add a (1 x n) bias to a whole (batch x n) batch.
         """
         if isinstance(other, Tensor):
-            assert self.shape == other.shape, "Shapes must match for addition"
-            result = [[self.data[i][j] + other.data[i][j] for j in range(self.shape[1])] for i in range(self.shape[0])]
-            return Tensor(result)
+            shape = _broadcast_shape(self.shape, other.shape)
+            a, b = _expand(self._values(), self.shape, shape), _expand(other._values(), other.shape, shape)
+            return Tensor._from_buffer(array(_typecode(self, other), [x + y for x, y in zip(a, b)]), shape)._track('add', (self, other))
         elif isinstance(other, (int, float)):
-            result = [[self.data[i][j] + Value(other) for j in range(self.shape[1])] for i in range(self.shape[0])]
-            return Tensor(result)
+            return Tensor._from_buffer(array(self.data.typecode, [x + other for x in self._values()]), self.shape)._track('add_scalar', (self,), other)
         else:
-            raise Exception("Must add either a Tensor, float, or int")
+            return NotImplemented  # gives the other operand (e.g. a LazyTensor) a chance, and raises a TypeError otherwise
 
     def __sub__(self, other):
         """
         If you pass in a Tensor, it subtracts each Tensor. If you pass in a scalar, it performs element wise subtraction of the scalar.
+        Tensors of different shapes get broadcast against each other, just like addition.
         """
         if isinstance(other, Tensor):
-            assert self.shape == other.shape, "Shapes must match for subtraction"
-            result = [[self.data[i][j] - other.data[i][j] for j in range(self.shape[1])] for i in range(self.shape[0])]
-            return Tensor(result)
+            shape = _broadcast_shape(self.shape, other.shape)
+            a, b = _expand(self._values(), self.shape, shape), _expand(other._values(), other.shape, shape)
+            return Tensor._from_buffer(array(_typecode(self, other), [x - y for x, y in zip(a, b)]), shape)._track('sub', (self, other))
         elif isinstance(other, (int, float)):
-            result = [[self.data[i][j] - Value(other) for j in range(self.shape[1])] for i in range(self.shape[0])]
-            return Tensor(result)
+            return Tensor._from_buffer(array(self.data.typecode, [x - other for x in self._values()]), self.shape)._track('sub_scalar', (self,), other)
         else:
-            raise Exception("Must subtract by either a Tensor, float, or int")
+            return NotImplemented  # gives the other operand (e.g. a LazyTensor) a chance, and raises a TypeError otherwise
 
     def __mul__(self, other):
         """
         If you pass in a Tensor, it MATRIX MULTIPLIES them together. If you pass in a scalar, it performs element wise multiplication of the scalar.
+        Matmul works over the last two dims: a (... x m x k) Tensor times a (k x n) matrix multiplies every matrix in the batch by it,
+        and two (... x m x k) and (... x k x n) Tensors with the same batch dims get multiplied matrix by matrix.
         """
         if isinstance(other, Tensor):
-            assert self.shape[1] == other.shape[0], "Shapes are not aligned for matrix multiplication"
-            result = []
-            for i in range(self.shape[0]):
-                result_row = []
-                for j in range(other.shape[1]):
-                    sum_value = Value(0)
-                    for k in range(self.shape[1]):
-                        sum_value += self.data[i][k] * other.data[k][j]
-                    result_row.append(sum_value)
-                result.append(result_row)
-            return Tensor(result)
+            assert len(self.shape) >= 2 and len(other.shape) >= 2, "Matrix multiplication needs at least 2D Tensors"
+            assert self.shape[-1] == other.shape[-2], "Shapes are not aligned for matrix multiplication"
+            assert len(other.shape) == 2 or self.shape[:-2] == other.shape[:-2], "Batched matmul needs the same batch dims on both sides"
+            a, b = self._values(), other._values()
+            k, n = self.shape[-1], other.shape[-1]
+            if len(other.shape) == 2:
+                out = _matmul(a, b, self.size // k, k, n)  # the batch dims just fold into more rows
+            else:
+                m = self.shape[-2]
+                out = array('d')
+                for i in range(self.size // (m * k)):
+                    out.extend(_matmul(a[i * m * k:(i + 1) * m * k], b[i * k * n:(i + 1) * k * n], m, k, n))
+            if _typecode(self, other) == 'f':
+                out = array('f', out)  # every dot product was summed in float64, and only gets rounded here
+            return Tensor._from_buffer(out, self.shape[:-1] + (n,))._track('matmul', (self, other))
         elif isinstance(other, (int, float)):
-            result = [[self.data[i][j] * Value(other) for j in range(self.shape[1])] for i in range(self.shape[0])]
-            return Tensor(result)
+            return Tensor._from_buffer(array(self.data.typecode, [x * other for x in self._values()]), self.shape)._track('mul_scalar', (self,), other)
         else:
-            raise Exception("Must multiply by a Tensor, float, or int")
+            return NotImplemented  # gives the other operand (e.g. a LazyTensor) a chance, and raises a TypeError otherwise
+
+    def __matmul__(self, other):
+        if not isinstance(other, Tensor):
+            return NotImplemented
+        return self * other
 
     def __truediv__(self, other):
         """
         Only does element-wise division of the scalar.
         """
         if isinstance(other, (int, float)):
-            result = [[self.data[i][j] / Value(other) for j in range(self.shape[1])] for i in range(self.shape[0])]
-            return Tensor(result)
+            return Tensor._from_buffer(array(self.data.typecode, [x / other for x in self._values()]), self.shape)._track('div_scalar', (self,), other)
         else:
             raise Exception("Must divide by either a float or int")
 
-    def backprop(self):
-        for row in self.data:
-            for value in row:
-                value.backprop()
+    def __pow__(self, other):
+        """
+        Raises every element to a scalar power, element-wise (e.g. `(predicted - target) ** 2` squares each entry).
+        """
+        if isinstance(other, (int, float)):
+            return Tensor._from_buffer(array(self.data.typecode, [x ** other for x in self._values()]), self.shape)._track('pow', (self,), other)
+        else:
+            raise Exception("Can only raise to a float or int power")
+
+    def _affine(self, scale: float, shift: float):
+        """
+        Computes `self * scale + shift` element-wise as a single node (what lazy mode folds chains of scalar ops into).
+        """
+        return Tensor._from_buffer(array(self.data.typecode, [x * scale + shift for x in self._values()]), self.shape)._track('affine', (self,), (scale, shift))
+
+    def _seed(self, seed=None):
+        """
+        Sets this Tensor's gradients before backprop starts from it: all ones by default, otherwise a Tensor, nested list, or scalar of seed gradients.
+        """
+        if seed is None:
+            self._set_grad(array('d', [1.0]) * self.size)
+        elif isinstance(seed, Tensor):
+            assert seed.shape == self.shape, "Seed gradient must have the same shape as the Tensor"
+            self._set_grad(seed._values())
+        elif isinstance(seed, (int, float)):
+            self._set_grad(array('d', [float(seed)]) * self.size)
+        else:
+            self._seed(Tensor(seed))
+
+    def backprop(self, seed=None, retain_graph: bool = False):
+        """
+        Computes the gradients of every Tensor (and `Value`) that this Tensor was calculated from, in a single pass over the graph.
+        Every entry of this Tensor is seeded with a gradient of 1, unless you pass in your own seed gradients.
+        The graph is freed along the way, unless retain_graph is set (needed to backprop through the same graph again).
+        """
+        backprop([self], [seed], retain_graph)
 
     def gradient(self):
         """
         Returns the gradients of this Tensor as its own Tensor!
         """
-        result = [[Value(x.gradient) for x in row] for row in self.data]
-        return Tensor(result)
-    
+        return Tensor._from_buffer(array(self.grad.typecode, self._gather(self.grad)), self.shape)
+
     def zero(self):
         """
-        Zeros out this Tensor by setting the gradients of everything to zero.
+        Zeros out this Tensor by setting the gradients of everything to zero, and detaches it from whatever graph it came from.
         """
-        for row in self.data:
-            for value in row:
-                value.zero()
-    
+        self._set_grad(_zeros(self.size))
+        self._dependents = ()
+        self._op = ''
+        self._saved = None
+
     def sum(self) -> Value:
         """
-        Sums all values in this 2D tensor in a gradient-friendly way.
+        Sums all values in this tensor in a gradient-friendly way.
         """
-        total = Value(0)
-        for row in self.data:
-            for value in row:
-                total += value
-        return total
+        return Value(sum(self._values()))._track('tensor_sum', (self,))
+
+def _add_backprop(out):
+    a, b = out._dependents
+    a._add_grad(_reduce(out.grad, out.shape, a.shape))
+    b._add_grad(_reduce(out.grad, out.shape, b.shape))
+
+def _add_scalar_backprop(out):
+    out._dependents[0]._add_grad(out.grad)
+
+def _sub_backprop(out):
+    a, b = out._dependents
+    a._add_grad(_reduce(out.grad, out.shape, a.shape))
+    b._add_grad(_reduce(out.grad, out.shape, b.shape), -1.0)
+
+def _matmul_backprop(out):
+    # the whole op's gradient in two matmuls: dA = dC * B^T and dB = A^T * dC
+    a, b = out._dependents
+    a_values, b_values = a._values(), b._values()
+    k, n = a.shape[-1], b.shape[-1]
+    if len(b.shape) == 2:
+        m = a.size // k
+        a._add_grad(_matmul_nt(out.grad, b_values, m, n, k))
+        b._add_grad(_matmul_tn(a_values, out.grad, m, k, n))
+        return
+    m = a.shape[-2]
+    a_grad, b_grad = array('d'), array('d')
+    for i in range(a.size // (m * k)):
+        grad = out.grad[i * m * n:(i + 1) * m * n]
+        a_grad.extend(_matmul_nt(grad, b_values[i * k * n:(i + 1) * k * n], m, n, k))
+        b_grad.extend(_matmul_tn(a_values[i * m * k:(i + 1) * m * k], grad, m, k, n))
+    a._add_grad(a_grad)
+    b._add_grad(b_grad)
+
+def _mul_scalar_backprop(out):
+    out._dependents[0]._add_grad(out.grad, out._saved)
+
+def _div_scalar_backprop(out):
+    out._dependents[0]._add_grad(out.grad, 1 / out._saved)
+
+def _pow_backprop(out):
+    x, exponent = out._dependents[0], out._saved
+    x._add_grad([exponent * value ** (exponent - 1) * g for value, g in zip(x._values(), out.grad)])
+
+def _affine_backprop(out):
+    out._dependents[0]._add_grad(out.grad, out._saved[0])
+
+def _contiguous_backprop(out):
+    out._dependents[0]._add_grad(out.grad)  # also used for casts: either way, the gradients pass straight through
+
+def _sum_backprop(total):
+    x = total._dependents[0]
+    x._add_grad(array('d', [1.0]) * x.size, total.gradient)
+
+# one backprop function per op tag, shared by every Tensor; other modules (like activations) register their own ops here too
+_BACKPROPS = {
+    'add': _add_backprop,
+    'add_scalar': _add_scalar_backprop,
+    'sub': _sub_backprop,
+    'sub_scalar': _add_scalar_backprop,
+    'matmul': _matmul_backprop,
+    'mul_scalar': _mul_scalar_backprop,
+    'div_scalar': _div_scalar_backprop,
+    'pow': _pow_backprop,
+    'affine': _affine_backprop,
+    'view': lambda out: None,  # a view shares its original's gradient buffer, so there's nothing left to pass back
+    'contiguous': _contiguous_backprop,
+    'cast': _contiguous_backprop,
+    'released': _released_backprop,
+}
+_VALUE_BACKPROPS['tensor_sum'] = _sum_backprop  # Tensor.sum produces a Value, so its backprop lives in the Value table
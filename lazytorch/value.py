@@ -1,128 +1,213 @@
+from . import autograd
+from .autograd import _released_backprop, next_node_id, backprop, is_grad_enabled
+
+# backprop functions work on `_gradient` directly: the engine zeros any stale gradient (see `gradient`) before a node's parents
+# can pass anything into it, so inside backprop every gradient is already current
+
+def _add_backprop(out):
+    a, b = out._dependents
+    a._gradient += out._gradient
+    b._gradient += out._gradient
+
+def _add_scalar_backprop(out):
+    out._dependents[0]._gradient += out._gradient
+
+def _sub_backprop(out):
+    a, b = out._dependents
+    a._gradient += out._gradient
+    b._gradient -= out._gradient
+
+def _mul_backprop(out):
+    a, b = out._dependents
+    a._gradient += b.value * out._gradient
+    b._gradient += a.value * out._gradient
+
+def _mul_scalar_backprop(out):
+    out._dependents[0]._gradient += out._saved * out._gradient
+
+def _div_backprop(out):
+    a, b = out._dependents
+    a._gradient += (1 / b.value) * out._gradient
+    b._gradient -= (a.value / (b.value ** 2)) * out._gradient
+
+def _div_scalar_backprop(out):
+    out._dependents[0]._gradient += (1 / out._saved) * out._gradient
+
+def _sum_backprop(out):
+    for x in out._dependents:
+        x._gradient += out._gradient
+
+def _dot_backprop(out):
+    half = len(out._dependents) // 2
+    xs, ys = out._dependents[:half], out._dependents[half:]
+    for x, y in zip(xs, ys):
+        x._gradient += y.value * out._gradient
+        y._gradient += x.value * out._gradient
+
+def _dot_scalar_backprop(out):
+    for x, c in zip(out._dependents, out._saved):
+        x._gradient += c * out._gradient
+
+# one backprop function per op tag, shared by every Value; other modules register their own ops that produce a Value (like Tensor.sum)
+_BACKPROPS = {
+    'add': _add_backprop,
+    'add_scalar': _add_scalar_backprop,
+    'sub': _sub_backprop,
+    'sub_scalar': _add_scalar_backprop,  # subtracting a constant passes the gradient straight through, just like adding one
+    'mul': _mul_backprop,
+    'mul_scalar': _mul_scalar_backprop,
+    'div': _div_backprop,
+    'div_scalar': _div_scalar_backprop,
+    'sum': _sum_backprop,
+    'dot': _dot_backprop,
+    'dot_scalar': _dot_scalar_backprop,
+    'released': _released_backprop,  # what a node turns into once backprop has freed its part of the graph
+}
+
 class Value:
+    # no per-instance __dict__: a node is just its value, gradient (and the generation it was written in), parents, op tag,
+    # and whatever operands its backprop needs
+    __slots__ = ('value', '_gradient', '_generation', '_dependents', '_op', '_saved', '_id')
+
     def __init__(self, value: float):
         if not isinstance(value, (float, int)):
             raise TypeError("Value must be a float or an int")
-        
+
         self.value = value
-        self.gradient = 0
-        self._backprop = self.placeholder_backprop
-        self._dependents = set()
+        self._gradient = 0
+        self._generation = 0  # whether this counts as stale doesn't matter: a zero gradient reads as zero either way
+        self._dependents = ()
+        self._op = ''
+        self._saved = None
+        self._id = next_node_id()
+
+    def _track(self, op: str, parents: tuple, saved=None):
+        """
+        Records this freshly computed Value as the output of an op on the given parents, unless graph building is turned off.
+        """
+        if is_grad_enabled():
+            self._op = op
+            self._dependents = parents
+            self._saved = saved
+        return self
+
+    @property
+    def gradient(self):
+        """
+        This Value's gradient, or 0 if it was written before the last `zero_grad()` (e.g. from `Network.zero()`).
+        """
+        return self._gradient if self._generation == autograd._generation else 0
+
+    @gradient.setter
+    def gradient(self, gradient):
+        self._gradient = gradient
+        self._generation = autograd._generation
 
-    def placeholder_backprop(self):
+    def _backprop(self):
         """
-        Placeholder value for backprop to allow for pickling and checkpointing (can't pickle Lambdas)!
+        Passes this Value's gradient back to its parents, using the backprop function registered for its op (leaves have none).
         """
-        return None
+        if self._op:
+            _BACKPROPS[self._op](self)
+
+    def __getstate__(self):
+        return (self.value, self.gradient, self._dependents, self._op, self._saved)
+
+    def __setstate__(self, state):
+        """
+        Gives unpickled nodes a fresh creation stamp, so they still count as older than anything computed from them in this process.
+        Since ops are stored as tags instead of closures, the whole graph (backprop included) survives pickling.
+        """
+        self.value, self.gradient, self._dependents, self._op, self._saved = state
+        self._id = next_node_id()
 
     def zero(self):
+        """
+        Zeros out the gradient, and detaches this Value from whatever graph it came from.
+        """
         self.gradient = 0
-        self._backprop = self.placeholder_backprop
+        self._dependents = ()
+        self._op = ''
+        self._saved = None
 
     def __str__(self):
         return str(self.value)
 
     def __add__(self, other):
         if isinstance(other, Value):
-            out = Value(self.value + other.value)
-
-            def add_backprop():
-                self.gradient += out.gradient
-                other.gradient += out.gradient
-            
-            out._backprop = add_backprop
-            out._dependents = {self, other}
+            return Value(self.value + other.value)._track('add', (self, other))
         elif isinstance(other, (int, float)):
-            out = Value(self.value + other)
-
-            def add_backprop():
-                self.gradient += out.gradient
-            
-            out._backprop = add_backprop
-            out._dependents = {self}
+            return Value(self.value + other)._track('add_scalar', (self,), other)
         else:
             raise TypeError("Unsupported type for addition")
-        return out
-    
+
     def __sub__(self, other):
         if isinstance(other, Value):
-            out = Value(self.value - other.value)
-
-            def sub_backprop():
-                self.gradient += out.gradient
-                other.gradient -= out.gradient
-
-            out._backprop = sub_backprop
-            out._dependents = {self, other}
+            return Value(self.value - other.value)._track('sub', (self, other))
         elif isinstance(other, (int, float)):
-            out = Value(self.value - other)
-
-            def sub_backprop():
-                self.gradient += out.gradient
-
-            out._backprop = sub_backprop
-            out._dependents = {self}
+            return Value(self.value - other)._track('sub_scalar', (self,), other)
         else:
             raise TypeError("Unsupported type for subtraction")
-        return out
 
     def __mul__(self, other):
         if isinstance(other, Value):
-            out = Value(self.value * other.value)
-
-            def mul_backprop():
-                self.gradient += other.value * out.gradient
-                other.gradient += self.value * out.gradient
-
-            out._backprop = mul_backprop
-            out._dependents = {self, other}
+            return Value(self.value * other.value)._track('mul', (self, other))
         elif isinstance(other, (int, float)):
-            out = Value(self.value * other)
-
-            def mul_backprop():
-                self.gradient += other * out.gradient
-
-            out._backprop = mul_backprop
-            out._dependents = {self}
+            return Value(self.value * other)._track('mul_scalar', (self,), other)
         else:
             raise TypeError("Unsupported type for multiplication")
-        return out
-    
+
     def __truediv__(self, other):
         if isinstance(other, Value):
-            out = Value(self.value / other.value)
-
-            def div_backprop():
-                self.gradient += (1 / other.value) * out.gradient
-                other.gradient -= (self.value / (other.value ** 2)) * out.gradient
-
-            out._backprop = div_backprop
-            out._dependents = {self, other}
+            return Value(self.value / other.value)._track('div', (self, other))
         elif isinstance(other, (int, float)):
-            out = Value(self.value / other)
-
-            def div_backprop():
-                self.gradient += (1 / other) * out.gradient
-
-            out._backprop = div_backprop
-            out._dependents = {self}
+            return Value(self.value / other)._track('div_scalar', (self,), other)
         else:
             raise TypeError("Unsupported type for division")
-        return out
-
-    def backprop(self) -> float:
-        ordered_vals = []
-        visited_vals = set()
 
-        def build_order(val: Value):
-            if val not in visited_vals:
-                visited_vals.add(val)
-                for dep in val._dependents:
-                    build_order(dep)
-                ordered_vals.append(val)
-
-        build_order(self)
-
-        self.gradient = 1
+    @staticmethod
+    def sum(values) -> 'Value':
+        """
+        Adds up any number of Values (and plain numbers) as a single node with one parent per Value, instead of a chain of
+        binary adds as deep as the list is long. Backprop hands the same gradient to every parent in one flat loop.
+        """
+        parents = []
+        constant = 0
+        for x in values:
+            if isinstance(x, Value):
+                parents.append(x)
+            elif isinstance(x, (int, float)):
+                constant += x
+            else:
+                raise TypeError("Can only sum Values and numbers")
+        return Value(sum([x.value for x in parents]) + constant)._track('sum', tuple(parents), constant)
+
+    @staticmethod
+    def dot(xs, ys) -> 'Value':
+        """
+        Dot product of a sequence of Values with a sequence of Values or plain numbers (one or the other, not a mix), as a
+        single node instead of a chain of multiplies and adds.
+        """
+        xs, ys = list(xs), list(ys)
+        if len(xs) != len(ys):
+            raise TypeError("Both sides of a dot product must be the same length")
+        if not all(isinstance(x, Value) for x in xs):
+            raise TypeError("The left side of a dot product must be all Values")
+        if all(isinstance(y, Value) for y in ys):
+            return Value(sum([x.value * y.value for x, y in zip(xs, ys)]))._track('dot', tuple(xs + ys))
+        if all(isinstance(y, (int, float)) for y in ys):
+            return Value(sum([x.value * y for x, y in zip(xs, ys)]))._track('dot_scalar', tuple(xs), tuple(ys))
+        raise TypeError("The right side of a dot product must be all Values or all numbers")
+
+    def _seed(self, seed: float = None):
+        """
+        Sets this Value's gradient before backprop starts from it (1 by default, since it's the gradient of the output with respect to itself).
+        """
+        self.gradient = 1 if seed is None else seed
 
-        for val in reversed(ordered_vals):
-            val._backprop()
+    def backprop(self, seed: float = None, retain_graph: bool = False):
+        """
+        Computes the gradients of everything this Value was calculated from, with respect to this Value.
+        The graph is freed along the way, unless retain_graph is set (needed to backprop through the same graph again).
+        """
+        backprop([self], [seed], retain_graph)
@@ -0,0 +1,95 @@
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+from lazytorch import Tensor, DenseLayer, save_weights, WeightsCheckpoint, AsyncCheckpointer
+
+def example_1():
+    print("EXAMPLE 1\n")
+
+    # a layer rebuilt from a checkpoint keeps its fused activation
+    layer = DenseLayer(1, 3, activation='tanh')
+    layer.weights = Tensor([[2, -1, -1]])
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'weights.lzt')
+        save_weights([layer], path)
+        with WeightsCheckpoint(path) as checkpoint:
+            rebuilt = checkpoint.to_layers()[0]
+    print(rebuilt.activation)  # expected value = tanh
+    print([round(x, 4) for x in rebuilt(Tensor([[1]])).tolist()[0]])  # expected value = [0.964, -0.7616, -0.7616], same as the original layer (not [2, -1, -1])
+    print()
+    print()
+
+def example_2():
+    print("EXAMPLE 2\n")
+
+    # save, then load into fresh layers, and peek at the raw values through a (memory-mapped) view
+    layer = DenseLayer(2, 2)
+    layer.weights = Tensor([[1.5, -2], [0.25, 4]])
+    layer.biases = Tensor([[0.5, -0.5]])
+    loaded = DenseLayer(2, 2)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'weights.lzt')
+        save_weights([layer], path)
+        with WeightsCheckpoint(path) as checkpoint:
+            checkpoint.load_into([loaded])
+            weights = checkpoint.view(0, 0)
+            print(checkpoint.layers[0][0], checkpoint.layers[0][1][0][1])  # expected value = DenseLayer (2, 2)
+            print(list(weights))  # expected value = [1.5, -2.0, 0.25, 4.0]
+        # leaving the with block releases the view (instead of failing to close the file), even though we still hold onto it
+    print(loaded.weights.tolist(), loaded.biases.tolist())  # expected value = [[1.5, -2.0], [0.25, 4.0]] [[0.5, -0.5]]
+    print()
+    print()
+
+def example_3():
+    print("EXAMPLE 3\n")
+
+    # keep the last 2 and the best 1 of 6 checkpoints, with deltas in between full ones
+    layer = DenseLayer(2, 2)
+    metrics = [5, 1, 4, 3, 2, 6]
+    saved = {}
+    with tempfile.TemporaryDirectory() as directory:
+        with AsyncCheckpointer(directory, keep_last=2, keep_best=1, delta=True, full_every=3) as checkpointer:
+            for step, metric in enumerate(metrics):
+                layer.weights = Tensor([[step * 0.1, -step / 3], [step ** 0.5, 1 / (step + 1)]])
+                checkpointer.save([layer], step, metric)
+                saved[step] = list(layer.weights.data)
+            checkpointer.flush()
+            print(sorted(os.listdir(directory)))  # expected value = ['checkpoint_0.lzt', 'checkpoint_1.lztd', 'checkpoint_3.lzt', 'checkpoint_4.lztd', 'checkpoint_5.lztd']
+            print(os.path.basename(checkpointer.best), os.path.basename(checkpointer.latest))  # expected value = checkpoint_1.lztd checkpoint_5.lztd
+            # step 0 stays because delta 1 (the best) needs it, and 3 stays because 4 and 5 need it
+            for step in (1, 4, 5):
+                loaded = DenseLayer(2, 2)
+                AsyncCheckpointer.load_into([loaded], os.path.join(directory, f"checkpoint_{step}.lztd"))
+                print(list(loaded.weights.data) == saved[step])  # expected value = True, bit for bit
+    print()
+    print()
+
+def example_4():
+    print("EXAMPLE 4\n")
+
+    # float32 layers round-trip exactly, and float64 weights saved as float32 take half the space
+    layer = DenseLayer(2, 2)
+    layer.weights = Tensor([[0.1, -2.5], [1 / 3, 4]], dtype='float32')
+    layer.biases = Tensor([[0.5, -0.5]], dtype='float32')
+    loaded = DenseLayer(2, 2)  # float64, like the default
+    wide = DenseLayer(64, 64)
+    with tempfile.TemporaryDirectory() as directory:
+        save_weights([layer], os.path.join(directory, 'float32.lzt'))
+        with WeightsCheckpoint(os.path.join(directory, 'float32.lzt')) as checkpoint:
+            rebuilt = checkpoint.to_layers()[0]
+            checkpoint.load_into([loaded])
+        save_weights([wide], os.path.join(directory, 'wide.lzt'))
+        save_weights([wide], os.path.join(directory, 'wide_float32.lzt'), dtype='float32')
+        ratio = os.path.getsize(os.path.join(directory, 'wide_float32.lzt')) / os.path.getsize(os.path.join(directory, 'wide.lzt'))
+    print(rebuilt.weights.dtype, rebuilt.weights.data == layer.weights.data)  # expected value = float32 True, bit for bit
+    print(loaded.weights.dtype, list(loaded.weights.data) == list(layer.weights.data))  # expected value = float64 True, converted on load
+    print(round(ratio, 2))  # expected value = 0.5
+    print()
+    print()
+
+if __name__ == "__main__":
+    example_1()
+    example_2()
+    example_3()
+    example_4()
@@ -0,0 +1,69 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+from lazytorch import Tensor, DenseLayer, Leaky_ReLU, Sigmoid, MSE_Loss, MAE_Loss, Huber_Loss, Cross_Entropy_Loss, zero_grad
+from lazytorch.compile import CompiledStep
+
+def compare(forward_and_loss, parameters, inp: Tensor, target: Tensor):
+    """
+    Prints whether a compiled step gives the same loss and gradients as running it eagerly (up to float rounding).
+    """
+    zero_grad()
+    loss = forward_and_loss(inp, target)
+    loss.backprop()
+    eager_loss, eager_grads = loss.value, [list(p.grad) for p in parameters]
+
+    zero_grad()
+    compiled = CompiledStep(forward_and_loss, parameters)
+    compiled(inp, target)  # the first call just traces the step
+    zero_grad()
+    compiled_loss = compiled(inp, target)
+    compiled_grads = [list(p.grad) for p in parameters]
+    close = abs(compiled_loss - eager_loss) < 1e-12 and all(abs(a - b) < 1e-12 for ga, gb in zip(eager_grads, compiled_grads) for a, b in zip(ga, gb))
+    print(close)
+
+def example_1():
+    print("EXAMPLE 1\n")
+
+    # every loss, on top of a dense layer with a fused activation
+    layer = DenseLayer(2, 3, activation='tanh')
+    layer.weights = Tensor([[0.5, -1, 0.25], [1, 0.5, -0.75]])
+    inp = Tensor([[1, 2], [-1, 0.5]])
+    target = Tensor([[0, 1, 0], [1, 0, 0]])
+    for loss_fn in (MSE_Loss, MAE_Loss, Huber_Loss, Cross_Entropy_Loss):
+        compare(lambda x, y: loss_fn(layer(x), y), layer.parameters(), inp, target)  # expected value = True for each loss
+    print()
+    print()
+
+def example_2():
+    print("EXAMPLE 2\n")
+
+    # views (a transpose and a slice) and standalone activations between two layers
+    first, second = DenseLayer(2, 4), DenseLayer(2, 1, activation='leaky_relu')
+    first.weights = Tensor([[0.5, -1, 0.25, 2], [1, 0.5, -0.75, -0.5]])
+    second.weights = Tensor([[1.5], [-0.5]])
+
+    def forward_and_loss(x, y):
+        hidden = Leaky_ReLU(first(x))
+        hidden = Sigmoid(hidden.T.T[:, 1:3])  # views all the way down
+        return MSE_Loss(second(hidden), y)
+    compare(forward_and_loss, first.parameters() + second.parameters(), Tensor([[1, 2], [-1, 0.5], [0, 3]]), Tensor([[1], [0], [2]]))  # expected value = True
+    print()
+    print()
+
+def example_3():
+    print("EXAMPLE 3\n")
+
+    # every loss against a target that depends on parameters too, so both sides get gradients
+    first, second = DenseLayer(2, 3), DenseLayer(2, 3, activation='sigmoid')
+    first.weights = Tensor([[0.5, -1, 0.25], [1, 0.5, -0.75]])
+    second.weights = Tensor([[1, 0.5, -0.5], [-0.25, 2, 1]])
+    for loss_fn in (MSE_Loss, MAE_Loss, Huber_Loss, Cross_Entropy_Loss):
+        compare(lambda x, y: loss_fn(first(x), second(x)), first.parameters() + second.parameters(), Tensor([[1, 2], [-1, 0.5]]), Tensor([[0, 0, 0], [0, 0, 0]]))  # expected value = True for each loss
+    print()
+    print()
+
+if __name__ == "__main__":
+    example_1()
+    example_2()
+    example_3()
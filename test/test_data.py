@@ -0,0 +1,62 @@
+import os
+import sys
+import random
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+from lazytorch import DataLoader, TensorDataset, IterableDataset
+
+def firsts(batches) -> list:
+    return [[row[0] for row in inp.tolist()] for inp, target in batches]
+
+def example_1():
+    print("EXAMPLE 1\n")
+
+    # unshuffled batches come out in dataset order, and shuffled ones cover every sample once, in a new order every epoch
+    dataset = TensorDataset([[x] for x in range(10)], [[x * x] for x in range(10)])
+    print(firsts(DataLoader(dataset, batch_size=4, shuffle=False)))  # expected value = [[0.0, 1.0, 2.0, 3.0], [4.0, 5.0, 6.0, 7.0], [8.0, 9.0]]
+    random.seed(0)
+    loader = DataLoader(dataset, batch_size=4)
+    epochs = [sum(firsts(loader), []) for _ in range(2)]
+    print([sorted(epoch) == [float(x) for x in range(10)] for epoch in epochs], epochs[0] != epochs[1])  # expected value = [True, True] True
+    print(all(target[0] == inp[0] ** 2 for inp, target in zip(*[batch.tolist() for batch in next(iter(loader))])))  # expected value = True, rows stay paired
+    streamed = DataLoader(IterableDataset(lambda: ((x, x) for x in range(10))), batch_size=4, shuffle_buffer=3)
+    print(sorted(sum(firsts(streamed), [])) == [float(x) for x in range(10)])  # expected value = True
+    print()
+    print()
+
+def example_2():
+    print("EXAMPLE 2\n")
+
+    # drop_last leaves off the last, smaller batch, for both kinds of datasets (with or without prefetching)
+    dataset = TensorDataset(list(range(10)), list(range(10)))
+    print(len(DataLoader(dataset, batch_size=4)), len(DataLoader(dataset, batch_size=4, drop_last=True)))  # expected value = 3 2
+    print([len(batch) for batch in firsts(DataLoader(dataset, batch_size=4, shuffle=False, drop_last=True, prefetch=2))])  # expected value = [4, 4]
+    streamed = DataLoader(IterableDataset(lambda: ((x, x) for x in range(10))), batch_size=4, shuffle=False, drop_last=True)
+    print(firsts(streamed))  # expected value = [[0.0, 1.0, 2.0, 3.0], [4.0, 5.0, 6.0, 7.0]]
+    print()
+    print()
+
+def example_3():
+    print("EXAMPLE 3\n")
+
+    # breaking out of a prefetching loop (or just dropping it partway) stops its producer, and the next epoch is still whole
+    dataset = TensorDataset(list(range(100)), list(range(100)))
+    threads = threading.active_count()
+    for in_process in (False, True):
+        loader = DataLoader(dataset, batch_size=5, prefetch=2, prefetch_in_process=in_process)
+        for inp, target in loader:
+            break
+        print(threading.active_count() == threads)  # expected value = True, then True
+        print(sorted(sum(firsts(loader), [])) == [float(x) for x in range(100)])  # expected value = True, then True
+    loader = DataLoader(dataset, batch_size=5, prefetch=2)
+    abandoned = iter(loader)
+    next(abandoned)  # still holding onto it, so it never gets closed
+    print(sorted(sum(firsts(loader), [])) == [float(x) for x in range(100)])  # expected value = True, its producer was stopped before the reshuffle
+    print(list(abandoned), threading.active_count() == threads)  # expected value = [] True
+    print()
+    print()
+
+if __name__ == "__main__":
+    example_1()
+    example_2()
+    example_3()
@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+from lazytorch import Tensor, Network, DenseLayer, MSE_Loss
+from lazytorch.evaluation import evaluate_checkpoints
+
+class Line(Network):
+    def __init__(self):
+        super().__init__(MSE_Loss, [DenseLayer(1, 1)])
+
+    def forward(self, inp: Tensor) -> Tensor:
+        return self.layers[0](inp)
+
+    def train(self):
+        pass
+
+def line(slope: float, intercept: float) -> Line:
+    network = Line()
+    network.layers[0].weights = Tensor([[slope]])
+    network.layers[0].biases = Tensor([[intercept]])
+    return network
+
+def example_1():
+    print("EXAMPLE 1\n")
+
+    # pickled and weights-only checkpoints evaluate the same, inline or over a pool, in checkpoint order
+    grid = [0, 1, 2, 3]
+    with tempfile.TemporaryDirectory() as directory:
+        checkpoints = []
+        for epoch, (slope, intercept) in enumerate([(2, 1), (1, 0), (2, 0)]):
+            network = line(slope, intercept)
+            network.save_checkpoint(epoch, directory)
+            checkpoints.append(os.path.join(directory, f"epoch_{epoch}_checkpoint.pkl"))
+            checkpoints.append(os.path.join(directory, f"epoch_{epoch}.lzt"))
+            network.save_weights(checkpoints[-1])
+        inline = evaluate_checkpoints(checkpoints, grid, targets=lambda x: 2 * x + 1, network_factory=Line, processes=1)
+        pooled = evaluate_checkpoints(checkpoints, grid, targets=lambda x: 2 * x + 1, network_factory=Line, processes=2)
+    print([list(result.predictions) for result in inline[:2]])  # expected value = [[1.0, 3.0, 5.0, 7.0], [1.0, 3.0, 5.0, 7.0]]
+    print([(result.mse, result.max_error) for result in inline[::2]])  # expected value = [(0.0, 0.0), (7.5, 4.0), (1.0, 1.0)]
+    print([result.checkpoint for result in pooled] == checkpoints)  # expected value = True
+    print(all(a.predictions == b.predictions and a.mse == b.mse for a, b in zip(inline, pooled)))  # expected value = True
+    print()
+    print()
+
+def example_2():
+    print("EXAMPLE 2\n")
+
+    # a grid with nothing to evaluate over, or targets that don't line up with it, fail up front
+    for grid, targets in (([], None), ([0, 1, 2], [1, 2])):
+        try:
+            evaluate_checkpoints(['unused.pkl'], grid, targets)
+        except ValueError as error:
+            print(error)  # expected value = Need at least one grid point..., then Got 2 targets for 3 grid points...
+    print()
+    print()
+
+if __name__ == "__main__":
+    example_1()
+    example_2()
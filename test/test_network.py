@@ -0,0 +1,68 @@
+import os
+import sys
+import itertools
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+from lazytorch import Tensor, Network, DenseLayer, MSE_Loss, Profiler, no_grad
+
+class Multiples(Network):
+    def __init__(self, outputs: slice = None):
+        """
+        Maps x to [x, 2x, 3x], or just the slice of those picked by outputs.
+        """
+        super().__init__(MSE_Loss, [DenseLayer(1, 3)])
+        self.layers[0].weights = Tensor([[1, 2, 3]])
+        self.outputs = outputs
+
+    def forward(self, inp: Tensor) -> Tensor:
+        output = self.layers[0](inp)
+        return output if self.outputs is None else output[:, self.outputs]
+
+    def train(self):
+        pass
+
+def example_1():
+    print("EXAMPLE 1\n")
+
+    # predictions stream out of an endless generator, a chunk of 4 inputs at a time
+    predictions = Multiples(slice(1, 2)).predict(itertools.count(1), chunk_size=4)
+    print(list(itertools.islice(predictions, 6)))  # expected value = [2.0, 4.0, 6.0, 8.0, 10.0, 12.0], one float per input
+    print(list(Multiples(slice(0, 2)).predict([1, [2]])))  # expected value = [[1.0, 2.0], [2.0, 4.0]], one list per input
+    print(list(Multiples().predict([-1])))  # expected value = [[-1.0, -2.0, -3.0]]
+    print()
+    print()
+
+def example_2():
+    print("EXAMPLE 2\n")
+
+    # the profiler counts every layer's forward and backward, the loss, and the update, per training step
+    network = Multiples()
+    with Profiler() as profiler:
+        for _ in range(2):
+            network.train_step(Tensor([[1], [2]]), Tensor([[0, 0, 0], [1, 1, 1]]), 0.01)
+    print(profiler.stats[('DenseLayer[0]', 'forward')][0], profiler.stats[('DenseLayer[0]', 'backward')][0])  # expected value = 2 2
+    print(profiler.stats[('MSE_Loss', 'forward')][0], profiler.stats[('apply_gradients', 'update')][0])  # expected value = 2 2
+    print(profiler.stats[('DenseLayer[0]', 'forward')][2])  # expected value = 2, one fused dense node per step
+    network.train_step(Tensor([[1], [2]]), Tensor([[0, 0, 0], [1, 1, 1]]), 0.01)
+    print(profiler.stats[('DenseLayer[0]', 'forward')][0])  # expected value = 2, nothing gets recorded once it's off
+    print()
+    print()
+
+def example_3():
+    print("EXAMPLE 3\n")
+
+    # forward passes that never get backpropped don't pile up inside the profiler
+    network = Multiples()
+    with Profiler(max_scopes=100) as profiler:
+        predictions = list(network.predict(range(1000), chunk_size=1))  # no_grad, so no scopes at all
+        print(len(profiler.scopes))  # expected value = 0
+        for _ in range(1000):
+            network.forward(Tensor([[1]]))
+        print(len(profiler.scopes) <= 100)  # expected value = True
+    print(profiler.stats[('DenseLayer[0]', 'forward')][0])  # expected value = 2000, every call still counts
+    print()
+    print()
+
+if __name__ == "__main__":
+    example_1()
+    example_2()
+    example_3()
@@ -0,0 +1,82 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+from lazytorch import Tensor, SGD, RMSProp, Adam, Network, DenseLayer, MSE_Loss
+
+def run_steps(optimizer, weights: Tensor, steps: int):
+    for _ in range(steps):
+        loss = (weights ** 2).sum()  # gradient of each weight is 2 * weight
+        loss.backprop()
+        optimizer.step()
+        optimizer.zero()
+
+def example_1():
+    print("EXAMPLE 1: SGD")
+
+    weights = Tensor([[1.0, -2.0]])
+    run_steps(SGD([weights], lr=0.1), weights, steps=1)
+
+    print(weights)  # expected value = [[0.8, -1.6]]
+    print()
+
+def example_2():
+    print("EXAMPLE 2: SGD WITH MOMENTUM")
+
+    weights = Tensor([[1.0, -2.0]])
+    run_steps(SGD([weights], lr=0.1, momentum=0.9), weights, steps=2)
+
+    print(weights)  # expected value = [[0.46, -0.92]]
+    print()
+
+def example_3():
+    print("EXAMPLE 3: RMSPROP")
+
+    weights = Tensor([[1.0, -2.0]])
+    run_steps(RMSProp([weights], lr=0.1), weights, steps=1)
+
+    print(weights)  # expected value = [[0.0, -1.0]] (first step is lr / sqrt(1 - alpha) in the direction of the gradient)
+    print()
+
+def example_4():
+    print("EXAMPLE 4: ADAM")
+
+    weights = Tensor([[1.0, -2.0]])
+    run_steps(Adam([weights], lr=0.1), weights, steps=1)
+
+    print(weights)  # expected value = [[0.9, -1.9]] (first step is exactly lr in the direction of the gradient)
+    print()
+
+class Line(Network):
+    def __init__(self):
+        super().__init__(MSE_Loss, [DenseLayer(1, 1)])
+        self.layers[0].weights = Tensor([[1.0]])  # reassigned after the optimizer was built
+
+    def forward(self, inp: Tensor) -> Tensor:
+        return self.layers[0](inp)
+
+    def train(self):
+        pass
+
+def example_5():
+    print("EXAMPLE 5: REASSIGNED WEIGHTS")
+
+    # the optimizer follows weights reassigned after it was built, eagerly, compiled, and with its own state
+    network = Line()
+    network.train_step(Tensor([[1.0]]), Tensor([[3.0]]), 0.1)
+    print(network.layers[0].weights)  # expected value = [[1.4]], not [[1.0]]
+    network.compile()
+    network.layers[0].weights = Tensor([[2.0]])
+    network.train_step(Tensor([[1.0]]), Tensor([[3.0]]), 0.1)
+    print(network.layers[0].weights)  # expected value = [[2.12]] (the bias trained to 0.4 in the first step)
+    network.optimizer = Adam(network.parameters(), lr=0.1)
+    network.layers[0].weights = Tensor([[0.0]])
+    network.train_step(Tensor([[1.0]]), Tensor([[3.0]]), None)
+    print(round(network.layers[0].weights.item(), 6))  # expected value = 0.1, a fresh first Adam step
+    print()
+
+if __name__ == "__main__":
+    example_1()
+    example_2()
+    example_3()
+    example_4()
+    example_5()
@@ -0,0 +1,93 @@
+import os
+import sys
+import pickle
+import random
+import signal
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+from lazytorch import Tensor, Network, DenseLayer, MSE_Loss, DataParallelTrainer, sweep, grid_search
+
+class SmallNetwork(Network):
+    def __init__(self):
+        super().__init__(MSE_Loss, [DenseLayer(1, 4, activation='relu'), DenseLayer(4, 1)])
+        self.layers[0].weights = Tensor([[0.5, -0.25, 1, 0.75]])
+        self.layers[1].weights = Tensor([[1], [-0.5], [0.25], [0.5]])
+
+    def forward(self, inp: Tensor) -> Tensor:
+        return self.layers[1](self.layers[0](inp))
+
+    def train(self):
+        pass
+
+class Hidden(Network):
+    def __init__(self, hidden_size: int):
+        super().__init__(MSE_Loss, [DenseLayer(1, hidden_size, activation='tanh'), DenseLayer(hidden_size, 1)])
+
+    def forward(self, inp: Tensor) -> Tensor:
+        return self.layers[1](self.layers[0](inp))
+
+    def train(self):
+        pass
+
+def build(config: dict) -> Network:
+    return Hidden(config['hidden_size'])
+
+def build_or_die(config: dict) -> Network:
+    if config['hidden_size'] == 3:
+        os.kill(os.getpid(), signal.SIGKILL)  # the worker process dies mid-run
+    return build(config)
+
+def example_1():
+    print("EXAMPLE 1\n")
+
+    # training across 2 worker processes gives the same losses and weights as training in this one
+    inputs = [[x / 8] for x in range(-8, 8)]
+    targets = [[x[0] * x[0]] for x in inputs]
+    network = SmallNetwork()
+    single = pickle.loads(pickle.dumps(network))
+    with DataParallelTrainer(network, 2) as trainer:
+        parallel_losses = [trainer.train_step(inputs, targets, 0.1) for _ in range(3)]
+    single_losses = [single.train_step(Tensor(inputs), Tensor(targets), 0.1) for _ in range(3)]
+    print([round(loss, 10) for loss in parallel_losses] == [round(loss, 10) for loss in single_losses])  # expected value = True
+    print(all(abs(p - q) < 1e-12 for a, b in zip(network.parameters(), single.parameters()) for p, q in zip(a.data, b.data)))  # expected value = True
+    print(list(network.layers[0].weights.data) != [0.5, -0.25, 1, 0.75])  # expected value = True, they actually trained
+    print()
+    print()
+
+def example_2():
+    print("EXAMPLE 2\n")
+
+    # a sweep over a pool of processes gives exactly the same runs as one in this process
+    inputs = [[x / 8] for x in range(-8, 8)]
+    targets = [[x[0] * x[0]] for x in inputs]
+    configs = grid_search({'hidden_size': [2, 4], 'learning_rate': [0.05, 0.1]})
+    pooled = sorted(sweep(build, configs, inputs, targets, epochs=2, batch_size=4, processes=2), key=lambda result: result.index)
+    inline = list(sweep(build, configs, inputs, targets, epochs=2, batch_size=4, processes=1))
+    print(len(pooled))  # expected value = 4
+    print(all(a.losses == b.losses and a.weights == b.weights for a, b in zip(pooled, inline)))  # expected value = True
+    print(len(set(result.final_loss for result in pooled)))  # expected value = 4, every config trained differently
+    print()
+    print()
+
+def example_3():
+    print("EXAMPLE 3\n")
+
+    # sweeps that can't finish raise instead of hanging, and inline sweeps leave the caller's random state alone
+    inputs = [[x / 8] for x in range(-8, 8)]
+    targets = [[x[0] * x[0]] for x in inputs]
+    for factory, configs in ((build, [{'hidden_size': 2, 'activation': lambda x: x}, {'hidden_size': 4}]), (build_or_die, [{'hidden_size': 2}, {'hidden_size': 3}])):
+        try:
+            list(sweep(factory, configs, inputs, targets, processes=2))
+        except RuntimeError as error:
+            print(str(error).split(' (')[0].split(':')[0])  # expected value = Sweep failed, then Run 1
+    random.seed(0)
+    expected = random.random()
+    random.seed(0)
+    list(sweep(build, [{'hidden_size': 2}], inputs, targets, processes=1))
+    print(random.random() == expected)  # expected value = True
+    print()
+    print()
+
+if __name__ == "__main__":
+    example_1()
+    example_2()
+    example_3()
@@ -1,7 +1,7 @@
 import os
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
-from lazytorch import Tensor
+from lazytorch import Value, Tensor, Leaky_ReLU, Tanh, MSE_Loss, Cross_Entropy_Loss, lazy, DenseLayer, Checkpointed
 
 def example_1():
     print("EXAMPLE 1\n")
@@ -78,7 +78,186 @@ def example_3():
     print()
     print()
 
+def example_4():
+    print("EXAMPLE 4\n")
+
+    tensor1 = Tensor([[1, -2], [3, 4]])
+    tensor2 = Tensor([[5, 6], [7, 8]])
+    results = Leaky_ReLU(tensor1 * tensor2 / 2 - 10)
+    total = results.sum()
+
+    print(results)  # expected value = [[-0.145, -0.15], [11.5, 15]]
+    print()
+    print(total)  # expected value = 26.205
+    print()
+
+    total.backprop()
+
+    print("GRADIENTS:\n")
+    print(tensor1.gradient())  # expected value = [[0.055, 0.075], [5.5, 7.5]]
+    print()
+    print(tensor2.gradient())  # expected value = [[1.505, 1.505], [1.99, 1.99]]
+    print()
+    print()
+
+def example_5():
+    print("EXAMPLE 5\n")
+
+    logits = Tensor([[2, 0], [0, 1000]])
+    target = Tensor([[1, 0], [0, 1]])  # one-hot rows
+    loss = Cross_Entropy_Loss(logits, target)
+
+    print(loss)  # expected value = 0.0635 (no overflow, even with a logit of 1000)
+    print()
+
+    loss.backprop()
+
+    print("GRADIENTS:\n")
+    print(logits.gradient())  # expected value = [[-0.0596, 0.0596], [0, 0]], i.e. (softmax - target) / 2
+    print()
+
+    predicted = Tensor([[0.5, -1], [2, 0]])
+    loss = MSE_Loss(Tanh(predicted), Tensor([[0, 0], [0, 0]]))
+    print(loss)  # expected value = 0.4307
+    print()
+    loss.backprop()
+    print(predicted.gradient())  # expected value = [[0.1817, -0.1599], [0.0341, 0]]
+    print()
+    print()
+
+def example_6():
+    print("EXAMPLE 6\n")
+
+    tensor = Tensor([[1, 2, 3], [4, 5, 6]])
+    transposed = tensor.T  # a view: no data is copied
+    column = tensor[:, 1]
+    print(transposed)  # expected value = [[1, 4], [2, 5], [3, 6]]
+    print()
+    print(column)  # expected value = [2, 5]
+    print()
+    print(tensor.reshape(3, 2).shape)  # expected value = (3, 2)
+    print()
+
+    total = (transposed * Tensor([[1], [10]])).sum() + (column * 100.0).sum()
+    total.backprop()
+
+    print("GRADIENTS:\n")
+    print(tensor.gradient())  # expected value = [[1, 101, 1], [10, 110, 10]]
+    print()
+    print()
+
+def example_7():
+    print("EXAMPLE 7\n")
+
+    weights = Tensor([[1, -1], [2, 0]])
+    biases = Tensor([[0.5, 0.5]])
+    x = lazy(Tensor([[1, 1], [-1, 0]]))  # nothing below runs until the loss is needed
+    hidden = Leaky_ReLU(x * weights + biases, 0.1)  # fused into a single dense node
+    loss = ((hidden - Tensor([[3, 0], [0, 0]])) ** 2).sum() / 4  # fused into a single squared-error node
+    print(loss)  # expected value = 0.62625
+    print()
+    loss.backprop()
+    print(weights.gradient())  # expected value = [[0.2525, -0.7525], [0.25, -0.0025]]
+    print()
+    print()
+
+def example_8():
+    print("EXAMPLE 8\n")
+
+    layer = DenseLayer(2, 2)
+    layer.weights = Tensor([[1, -1], [2, 0]])
+    segment = Checkpointed(layer, Tanh)  # keeps no intermediate outputs; backprop recomputes them
+    x = Tensor([[1, 1], [-1, 0]])
+    loss = MSE_Loss(segment(x), Tensor([[0, 0], [0, 0]]))
+    print(loss)  # expected value = 0.6826
+    print()
+    loss.backprop()
+    print(layer.weights.gradient())  # expected value = [[0.1648, -0.3199], [0.0049, -0.1599]], same as without Checkpointed
+    print()
+    print()
+
+def example_9():
+    print("EXAMPLE 9\n")
+
+    # lazy mode gives the same gradients as eager, with a trainable operand on either side of the fused squared error
+    for use_lazy in (False, True):
+        wrap = lazy if use_lazy else (lambda tensor: tensor)
+        x, y = Tensor([[1, 2]]), Tensor([[3]])
+        w1, w2 = Tensor([[0.5], [0.25]]), Tensor([[1.5], [-1]])
+        ((y - wrap(x) * w1) ** 2).sum().backprop()
+        ((wrap(x) * w1 - wrap(x) * w2) ** 2).sum().backprop()
+        print(w1.gradient())  # expected value = [[-1.0], [-2.0]] both times
+        print(w2.gradient())  # expected value = [[-3.0], [-6.0]] both times
+        print()
+    print()
+
+def example_10():
+    print("EXAMPLE 10\n")
+
+    # the data lives in one flat array buffer, row by row, not in nested lists of Values
+    tensor = Tensor([[1, 2, 3], [4, 5, 6]])
+    print(tensor.data)  # expected value = array('d', [1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+    print(tensor.shape)  # expected value = (2, 3)
+    print(tensor.tolist())  # expected value = [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+    doubled = tensor * 2
+    doubled.sum().backprop()
+    print(tensor.grad)  # expected value = array('d', [2.0, 2.0, 2.0, 2.0, 2.0, 2.0]), a flat buffer too
+    try:
+        Tensor([[Value(1.0)]])
+    except TypeError:
+        print("TypeError")  # expected value = TypeError, since the Value would never get a gradient
+    print()
+    print()
+
+def example_11():
+    print("EXAMPLE 11\n")
+
+    # lazy mode matches eager with transposed weights, a DenseLayer subclass with its own __call__, and an intermediate we hold onto
+    class Scaled(DenseLayer):
+        def __call__(self, x):
+            return super().__call__(x) * 10
+
+    for use_lazy in (False, True):
+        wrap = lazy if use_lazy else (lambda tensor: tensor)
+        x, W, b = Tensor([[1, 2, 3]]), Tensor([[1, 2, 3], [4, 5, 6]]), Tensor([[0, 1]])
+        out = wrap(x) * W.T + b
+        print(out.tolist())  # expected value = [[14.0, 33.0]] both times
+        out.sum().backprop()
+        print(x.gradient().tolist())  # expected value = [[5.0, 7.0, 9.0]] both times
+        layer = Scaled(1, 3)
+        layer.weights = Tensor([[1, 2, 0]])
+        print(layer(wrap(Tensor([[1]]))).tolist())  # expected value = [[10.0, 20.0, 0.0]] both times
+        hidden = wrap(Tensor([[1, -2]])) * Tensor([[1, 0.5], [2, 1]]) + Tensor([[0.5, 0.5]])
+        MSE_Loss(Tanh(hidden), Tensor([[0, 0]])).backprop()
+        print([round(g, 4) for g in hidden.gradient().tolist()[0]])  # expected value = [-0.0262, -0.3199] both times
+        print()
+    print()
+
+def example_12():
+    print("EXAMPLE 12\n")
+
+    # a loss's target gets gradients too (the opposite of the prediction's), for when it depends on parameters
+    x = Tensor([[1, 2]])
+    w1, w2 = Tensor([[0.5], [0.25]]), Tensor([[1.5], [-1]])
+    MSE_Loss(x * w1, x * w2).backprop()
+    print(w1.gradient())  # expected value = [[3.0], [6.0]]
+    print(w2.gradient())  # expected value = [[-3.0], [-6.0]]
+    logits, target = Tensor([[2, 0]]), Tensor([[0.5, 0.5]])
+    Cross_Entropy_Loss(logits, target).backprop()
+    print([round(g, 4) for g in target.gradient().tolist()[0]])  # expected value = [0.1269, 2.1269], -log softmax of the logits
+    print()
+    print()
+
 if __name__ == "__main__":
     example_1()
     example_2()
     example_3()
+    example_4()
+    example_5()
+    example_6()
+    example_7()
+    example_8()
+    example_9()
+    example_10()
+    example_11()
+    example_12()
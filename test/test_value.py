@@ -1,7 +1,7 @@
 import os
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
-from lazytorch import Value
+from lazytorch import Value, Tensor, zero_grad, backprop, no_grad, is_grad_enabled
 
 def example_1():
     print("EXAMPLE 1")
@@ -85,9 +85,106 @@ def example_5():
     print(f'Gradient of f: {f.gradient}')  # expected value = 1
     print()
 
+def example_6():
+    print("EXAMPLE 6")
+
+    a = Value(2.0)
+    b = Value(3.0)
+
+    f = a * b
+    f.backprop(retain_graph=True)  # keeps the graph around so we can go through it again
+    f.backprop()  # gradients accumulate, and this time the graph gets freed
+
+    print(f'Gradient of a: {a.gradient}')  # expected value = 6.0
+    print(f'Gradient of b: {b.gradient}')  # expected value = 4.0
+    print(f'Parents of f after backprop: {f._dependents}')  # expected value = ()
+
+    try:
+        f.backprop()
+    except Exception as error:
+        print(f'Error: {error}')  # expected: error saying the graph was already freed
+    print()
+
+def example_7():
+    print("EXAMPLE 7")
+
+    a = Value(2.0)
+    b = Value(3.0)
+    c = Value(4.0)
+
+    total = Value.sum([a, b, c, 1.0])  # a single node with three parents, no matter how long the list is
+    dot = Value.dot([a, b], [c, a])  # a * c + b * a, also a single node
+    print(total)  # value = 10.0
+    print(dot)  # value = 14.0
+
+    dot.backprop()
+
+    print(f'Gradient of a: {a.gradient}')  # expected value = 7.0
+    print(f'Gradient of b: {b.gradient}')  # expected value = 2.0
+    print(f'Gradient of c: {c.gradient}')  # expected value = 2.0
+    print()
+
+def example_8():
+    print("EXAMPLE 8")
+
+    a = Value(2.0)
+    b = Value(3.0)
+    (a * b).backprop()
+    print(f'Gradient of a: {a.gradient}')  # expected value = 3.0
+
+    zero_grad()  # zeros every gradient at once, without touching a single Value
+    print(f'Gradient of a: {a.gradient}')  # expected value = 0
+
+    (a * b).backprop()
+    (a * b).backprop()
+    print(f'Gradient of a: {a.gradient}')  # expected value = 6.0, accumulated since the zero_grad only
+    print()
+
+def example_9():
+    print("EXAMPLE 9")
+
+    # a chain way deeper than the recursion limit: backprop walks it with a heap, not recursion
+    x = Value(1.0)
+    out = x
+    for _ in range(sys.getrecursionlimit() * 5):
+        out = out * 1.0 + 1.0
+    out.backprop()
+    print(f'Gradient of x: {x.gradient}')  # expected value = 1.0
+
+    # several roots, with their own seeds, sharing parts of the same graph, all in a single pass
+    a = Value(2.0)
+    b = Value(3.0)
+    shared = a * b
+    first = shared + a   # d first / d a = b + 1 = 4, d first / d b = a = 2
+    second = shared * b  # d second / d a = b * b = 9, d second / d b = 2 * a * b = 12
+    backprop([first, second, shared], [1.0, 2.0, -1.0])
+    print(f'Gradient of a: {a.gradient}')  # expected value = 19.0, from 4 + 2 * 9 - 3
+    print(f'Gradient of b: {b.gradient}')  # expected value = 24.0, from 2 + 2 * 12 - 2
+    print()
+
+def example_10():
+    print("EXAMPLE 10")
+
+    a = Value(2.0)
+    b = Tensor([[1, 2]])
+    with no_grad():
+        print(is_grad_enabled())  # expected value = False
+        c = a * 3 + 1
+        d = b * 2
+        print(c.value, d.tolist())  # expected value = 7.0 [[2.0, 4.0]], the same results as always
+        print(len(c._dependents), len(d._dependents))  # expected value = 0 0, since no graph got built
+    print(is_grad_enabled())  # expected value = True, back to normal outside the block
+    print(len((a * 3)._dependents))  # expected value = 1
+    print()
+
 if __name__ == "__main__":
     example_1()
     example_2()
     example_3()
     example_4()
     example_5()
+    example_6()
+    example_7()
+    example_8()
+    example_9()
+    example_10()